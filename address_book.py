@@ -0,0 +1,203 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+
+ADDRESS_DB = "addresses.db"
+LEGACY_ADDRESS_LOG = "address.log"  # Imported into the database the first time it is opened
+
+
+def read_address_log(path=LEGACY_ADDRESS_LOG):
+    """Read address.log in file order (newest first), upper-cased and de-duplicated."""
+    try:
+        with open(path, "r", encoding="utf-8-sig") as file:
+            lines = file.read().splitlines()
+    except UnicodeDecodeError:
+        # If there's an error reading with utf-8, try another encoding
+        with open(path, "r", encoding="ISO-8859-1") as file:
+            lines = file.read().splitlines()
+    except FileNotFoundError:
+        return []
+    return list(OrderedDict.fromkeys(line.strip().upper() for line in lines if line.strip()))
+
+
+class AddressStore:
+    """SQLite-backed address registry with an in-memory ordered index (newest first)."""
+
+    def __init__(self, path=ADDRESS_DB, legacy_log=LEGACY_ADDRESS_LOG):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)  # Shared by the UI and worker threads
+        created = self._db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'addresses'"
+                                   ).fetchone() is None
+        self._db.execute("CREATE TABLE IF NOT EXISTS addresses ("
+                         "address TEXT PRIMARY KEY, lat REAL, lng REAL, position INTEGER NOT NULL)")
+        self._db.commit()
+
+        # address -> (lat, lng), most recently added first; all lookups and listings are served from here
+        self._index = OrderedDict()
+        for address, lat, lng in self._db.execute("SELECT address, lat, lng FROM addresses ORDER BY position DESC"):
+            self._index[address] = (lat, lng)
+        self._next_position = (self._db.execute("SELECT MAX(position) FROM addresses").fetchone()[0] or 0) + 1
+
+        if created and legacy_log:  # Only a brand-new database; an emptied one stays empty
+            legacy = read_address_log(legacy_log)
+            self.add_many((address, None, None) for address in reversed(legacy))  # Oldest first keeps the order
+
+    def __contains__(self, address):
+        return address in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def addresses(self):
+        """Return all addresses, newest first."""
+        with self._lock:
+            return list(self._index)
+
+    def locations(self):
+        """Return (address, lat, lng) tuples, newest first; lat/lng are None until geocoded."""
+        with self._lock:
+            return [(address, lat, lng) for address, (lat, lng) in self._index.items()]
+
+    def add(self, address, lat=None, lng=None):
+        """Insert an address at the top; returns False if it already exists."""
+        return self.add_many([(address, lat, lng)]) == 1
+
+    def add_many(self, entries):
+        """Insert (address, lat, lng) entries in one transaction, the last one ending up on top; returns the count added."""
+        with self._lock:
+            staged = OrderedDict()  # Applied to the index only once the transaction has committed
+            with self._db:  # A single transaction: the whole batch lands or none of it does
+                for address, lat, lng in entries:
+                    if address in self._index or address in staged:
+                        continue
+                    self._db.execute("INSERT INTO addresses (address, lat, lng, position) VALUES (?, ?, ?, ?)",
+                                     (address, lat, lng, self._next_position + len(staged)))
+                    staged[address] = (lat, lng)
+            self._next_position += len(staged)
+            for address, coordinates in staged.items():
+                self._index[address] = coordinates
+                self._index.move_to_end(address, last=False)  # Newest first
+        return len(staged)
+
+    def set_coordinates(self, address, lat, lng):
+        """Store the coordinates of an existing address."""
+        with self._lock, self._db:
+            if address in self._index:
+                self._db.execute("UPDATE addresses SET lat = ?, lng = ? WHERE address = ?", (lat, lng, address))
+                self._index[address] = (lat, lng)
+
+    def remove(self, address):
+        """Delete an address; returns False if it wasn't saved."""
+        with self._lock, self._db:
+            if address not in self._index:
+                return False
+            self._db.execute("DELETE FROM addresses WHERE address = ?", (address,))
+            del self._index[address]
+            return True
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_address_store():
+    """Return the shared AddressStore, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AddressStore()
+        return _store
+
+
+def load_addresses():
+    """Return all saved addresses, newest first (served from the in-memory index)."""
+    return get_address_store().addresses()
+
+
+def load_temp_address():
+    """Load the most recent temporary address from temp.log."""
+    try:
+        with open("temp.log", "r", encoding="utf-8") as file:
+            return file.readline().strip()  # Read the address from the first line of temp.log
+    except FileNotFoundError:
+        return ""  # Return an empty string if temp.log is not found
+
+
+def save_address(address):
+    """Save a new address to the address store after validating it; safe to run off the Tk thread."""
+    cleaned_address = address.strip().upper()  # Clean and convert address to uppercase
+
+    if not cleaned_address:
+        print("Address is empty or invalid.")  # If address is empty, don't save it
+        return
+
+    # Convert the address to coordinates and get the formatted address
+    from geocode import get_coordinates  # Imported on first save so listing addresses stays cheap at startup
+    from http_client import QuotaExceeded
+    try:
+        formatted_address, lat, lng = get_coordinates(cleaned_address)
+    except QuotaExceeded as e:
+        print(f"Address not saved: {e}. Try again after 00:00 UTC.")  # Not an invalid address
+        return
+
+    if not formatted_address or not lat or not lng:
+        print("Invalid location. Coordinates not found.")  # If coordinates are invalid, don't save the address
+        return
+
+    formatted_address_upper = formatted_address.upper()  # Ensure it's in uppercase for consistency
+
+    try:
+        # Insert the new address at the top of the list, with its coordinates
+        if not get_address_store().add(formatted_address_upper, lat, lng):
+            print("Address already exists. Duplicate addresses are not allowed.")  # Prevent duplicate addresses
+            return
+        print(f"Address '{formatted_address_upper}' saved.")  # Confirm the save
+
+        # Save the formatted address to temp.log
+        save_temp_address(formatted_address_upper)
+        return formatted_address_upper  # Caller refreshes the combobox on the UI thread
+
+    except Exception as e:
+        print(f"Error saving address: {e}")  # Print any error that occurs while saving
+
+
+def save_temp_address(address):
+    """Save the temporary address to temp.log."""
+    with open("temp.log", "w", encoding="utf-8") as file:
+        file.write(address + "\n")
+
+
+def delete_address(address):
+    """Delete the selected address from the address store."""
+    try:
+        if get_address_store().remove(address):
+            print(f"Address '{address}' deleted.")  # Confirm the deletion
+            return True  # Caller refreshes any UI listing the addresses
+        print(f"Address '{address}' not found.")  # Print if the address wasn't found
+    except Exception as e:
+        print(f"Error deleting address: {e}")  # Print any errors that occur while deleting
+    return False
+
+
+def load_saved_locations():
+    """Return (address, lat, lng) for every saved address, geocoding (and storing) any missing coordinates."""
+    from geocode import get_coordinates
+    from http_client import QuotaExceeded
+    store = get_address_store()
+    locations = []
+    budget_spent = False
+    for address, lat, lng in store.locations():
+        if lat is None or lng is None:
+            if budget_spent:
+                continue  # Geocoded on a later run, once the budget resets
+            try:
+                formatted_address, lat, lng = get_coordinates(address)  # Legacy entries imported without coordinates
+            except QuotaExceeded as e:
+                print(f"Skipping addresses without coordinates: {e}")
+                budget_spent = True
+                continue
+            if not formatted_address:
+                continue
+            store.set_coordinates(address, lat, lng)
+        locations.append((address, lat, lng))
+    return locations
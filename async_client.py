@@ -0,0 +1,104 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+import http_client
+import metrics
+import quota
+
+# aiohttp is only needed by the async pollers, so it is imported when the first session is opened
+POOL_SIZE = 200  # Connections kept open across all hosts
+POOL_SIZE_PER_HOST = 100
+MAX_CONCURRENT_REQUESTS = 200  # Cap on requests in flight per event loop; thousands of sites can be queued
+
+_sessions = {}  # event loop -> (aiohttp.ClientSession, asyncio.Semaphore)
+
+
+async def get_session():
+    """Return the (session, request slots) pair of the running event loop, creating them on first use."""
+    loop = asyncio.get_running_loop()
+    entry = _sessions.get(loop)
+    if entry is None:
+        import aiohttp
+        connector = aiohttp.TCPConnector(limit=POOL_SIZE, limit_per_host=POOL_SIZE_PER_HOST, ttl_dns_cache=300)
+        entry = _sessions[loop] = (aiohttp.ClientSession(connector=connector),
+                                   asyncio.Semaphore(MAX_CONCURRENT_REQUESTS))
+    return entry
+
+
+async def close():
+    """Close the running event loop's session; call before the loop ends."""
+    entry = _sessions.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry[0].close()
+
+
+def _get_json_through_session(url, params, priority):
+    with quota.priority(priority):
+        return http_client.get_json(url, params)
+
+
+def _http_error(url, status, reason=""):
+    """Build the requests.HTTPError the sync client would raise, so callers handle both paths alike."""
+    response = requests.Response()
+    response.status_code = status
+    response.reason = reason
+    response.url = url
+    return requests.HTTPError(f"{status} Error: {reason} for url: {url}", response=response)
+
+
+async def get_json(url, params=None, priority=None):
+    """Async http_client.get_json: same quotas, retries, backoff and metrics, on one shared aiohttp pool.
+
+    Raises the same requests exceptions as the sync client. With a replay transport installed, recording
+    or replaying, the request goes through http_client on a worker thread, so recordings serve both paths.
+    """
+    if http_client.has_transport():
+        priority = quota.current_priority() if priority is None else priority  # The worker thread has its own
+        return await asyncio.to_thread(_get_json_through_session, url, params, priority)
+    import aiohttp
+    session, slots = await get_session()
+    connect, read = http_client.timeout_for(url)
+    timeout = aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+    query = {k: str(v) for k, v in (params or {}).items()}
+    host = urlsplit(url).hostname
+    attempt = 0
+    while True:
+        delay = quota.reserve(host, priority)
+        if delay is None:
+            raise http_client.QuotaExceeded(f"Daily request budget for {host} is spent")
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            async with slots:  # Bound the number of concurrent requests
+                started = time.perf_counter()
+                try:
+                    async with session.get(url, params=query, timeout=timeout) as response:
+                        status, reason = response.status, response.reason
+                        retry_after = response.headers.get("Retry-After")
+                        body = await response.read()
+                finally:
+                    metrics.observe("http_request_seconds", time.perf_counter() - started, host=host)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            metrics.inc("http_requests_total", host=host, status=type(e).__name__)
+            if attempt >= http_client.MAX_RETRIES:
+                raise requests.ConnectionError(f"{host}: {e!r}") from e
+            metrics.inc("http_retries_total", host=host)
+            await asyncio.sleep(http_client.backoff_delay(attempt))
+            attempt += 1
+            continue
+
+        metrics.inc("http_requests_total", host=host, status=status)
+        if status in http_client.RETRY_STATUSES and attempt < http_client.MAX_RETRIES:
+            metrics.inc("http_retries_total", host=host)
+            delay = http_client.backoff_delay(attempt, retry_after)
+            if not (status == 429 and quota.penalize(host, delay)):
+                await asyncio.sleep(delay)  # A 429 on a governed host instead holds back every caller of the host
+            attempt += 1
+            continue
+        if status >= 400:
+            raise _http_error(url, status, reason)
+        return json.loads(body)
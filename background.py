@@ -0,0 +1,59 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+
+class BackgroundWorker:
+    """Run blocking jobs off the Tk thread and hand their results back through a thread-safe queue."""
+
+    def __init__(self, max_workers=4, name="worker"):
+        self.name = name  # Label for this worker's metrics
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weather-worker")
+        self._results = queue.Queue()  # (callback, args) pairs waiting to run on the UI thread
+        metrics.gauge_callback("worker_queue_depth", self.pending, worker=name)
+
+    def submit(self, func, *args, callback=None, error_callback=None):
+        """Run func(*args) on a worker thread; callback(result) or error_callback(exc) later runs on the UI thread."""
+        def run():
+            try:
+                result = func(*args)
+            except Exception as e:
+                if error_callback:
+                    self.post(error_callback, e)
+                else:
+                    print(f"Background job failed: {e}")
+                return
+            finally:
+                metrics.add_gauge("worker_jobs_in_flight", -1, worker=self.name)
+            if callback:
+                self.post(callback, result)
+
+        metrics.add_gauge("worker_jobs_in_flight", 1, worker=self.name)
+        return self._executor.submit(run)
+
+    def post(self, callback, *args):
+        """Queue callback(*args) to run on the UI thread; safe to call from any thread."""
+        self._results.put((callback, args))
+
+    def pending(self):
+        """Return the number of results waiting to be handled by the UI thread."""
+        return self._results.qsize()
+
+    def poll(self, widget, interval_ms=50):
+        """Drain finished jobs on the UI thread, then reschedule itself with widget.after."""
+        while True:
+            try:
+                callback, args = self._results.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"UI callback failed: {e}")  # Never let one bad result stop the polling loop
+        if widget.winfo_exists():
+            widget.after(interval_ms, self.poll, widget, interval_ms)
+
+    def shutdown(self):
+        """Stop accepting jobs without waiting for in-flight ones."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,162 @@
+import argparse
+import atexit
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import http_client
+import replay
+import weather_cache
+import geocode
+from geocode_cache import GeocodeCache
+from fetch_weather import (fetch_forecast, derive_weather, format_weather, get_weather, calculate_hsi,
+                           calculate_wind_chill, calculate_solar_noon)
+from rain_stat import get_rain_message, detect_typhoon_level
+
+STAGES = ("geocode", "fetch", "derive", "hsi", "wind_chill", "solar_noon", "rain_message", "typhoon_level",
+          "render", "get_weather")
+
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return None
+    rank = max(1, math.ceil(round(fraction * len(sorted_samples), 9)))  # round(): 0.99 * 100 is 99.00000000000001
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def summarize(samples):
+    """Turn a list of durations (seconds) into throughput and latency figures."""
+    samples = sorted(samples)
+    total = sum(samples)
+    return {
+        "count": len(samples),
+        "total_s": round(total, 6),
+        "throughput_per_s": round(len(samples) / total, 1) if total else None,
+        "mean_ms": round(total / len(samples) * 1000, 4) if samples else None,
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 4) if samples else None,
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 4) if samples else None,
+    }
+
+
+def timed(samples, func, *args):
+    """Call func(*args), appending its duration to samples; returns its result."""
+    start = time.perf_counter()
+    result = func(*args)
+    samples.append(time.perf_counter() - start)
+    return result
+
+
+def run_benchmark(addresses, iterations=20, repeat=100):
+    """Time every pipeline stage over `iterations` cold rounds; pure stages are repeated `repeat` times per round."""
+    samples = {stage: [] for stage in STAGES}
+    real_cache = geocode.geocode_cache
+    with tempfile.TemporaryDirectory() as scratch:
+        try:
+            for _ in range(iterations):
+                # Fresh caches every round so geocoding and fetching actually go through the transport
+                geocode.geocode_cache = GeocodeCache(path=os.path.join(scratch, "geocode_cache.json"),
+                                                     save_interval=float("inf"))
+                atexit.unregister(geocode.geocode_cache.save)  # The scratch cache is thrown away
+                weather_cache.clear()
+                http_client.clear_recent()
+
+                for address in addresses:
+                    formatted_address, lat, lng = timed(samples["geocode"], geocode.get_coordinates, address)
+                    if not formatted_address:
+                        continue
+                    payload = timed(samples["fetch"], fetch_forecast, lat, lng)
+                    today = datetime.now()
+                    observation = None
+                    for _ in range(repeat):
+                        observation = timed(samples["derive"], derive_weather, payload, lat, lng,
+                                            formatted_address, today)
+                    if observation is None:
+                        continue
+                    for _ in range(repeat):
+                        timed(samples["hsi"], calculate_hsi, observation.temp_c, observation.humidity)
+                        timed(samples["wind_chill"], calculate_wind_chill, observation.temp_c, observation.wind_kph)
+                        timed(samples["solar_noon"], calculate_solar_noon, lng, today)
+                        timed(samples["rain_message"], get_rain_message, observation.precip_mm)
+                        timed(samples["typhoon_level"], detect_typhoon_level, observation.precip_mm,
+                              observation.wind_kph)
+                        timed(samples["render"], format_weather, observation)
+
+                weather_cache.clear()
+                http_client.clear_recent()
+                for address in addresses:
+                    formatted_address, lat, lng = geocode.get_coordinates(address)  # Warm: only the fetch is timed
+                    if formatted_address:
+                        timed(samples["get_weather"], get_weather, lat, lng, formatted_address)
+        finally:
+            geocode.geocode_cache = real_cache
+    return {stage: summarize(stage_samples) for stage, stage_samples in samples.items()}
+
+
+def compare(report, baseline, tolerance):
+    """Return a list of stages whose p50 got slower than the baseline by more than `tolerance` (a fraction)."""
+    regressions = []
+    for stage, stats in report["stages"].items():
+        before = baseline.get("stages", {}).get(stage, {}).get("p50_ms")
+        after = stats["p50_ms"]
+        if before and after and after > before * (1 + tolerance):
+            regressions.append(f"{stage}: p50 {before} ms -> {after} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each pipeline stage against recorded responses.")
+    parser.add_argument("addresses", nargs="*", help="Addresses to run (default: all saved addresses)")
+    parser.add_argument("--fixtures", default=replay.FIXTURES_DIR,
+                        help="Recorded responses to replay (default: fixtures); record them with headless.py --record")
+    parser.add_argument("--live", action="store_true", help="Hit the real APIs instead of the recordings")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to each replayed response")
+    parser.add_argument("--iterations", type=int, default=20, help="Cold rounds over the addresses (default: 20)")
+    parser.add_argument("--repeat", type=int, default=100, help="Calls per round for the pure stages (default: 100)")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier report to compare against; exits 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed p50 slowdown against the baseline (default: 0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    transport = None if args.live else replay.install("replay", args.fixtures, latency=args.latency)
+    addresses = args.addresses
+    if not addresses:
+        from address_book import load_addresses
+        addresses = load_addresses()
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "addresses": len(addresses),
+        "iterations": args.iterations,
+        "repeat": args.repeat,
+        "transport": "live" if args.live else f"replay:{args.fixtures}",
+        "stages": run_benchmark(addresses, args.iterations, args.repeat),
+    }
+    if transport is not None:
+        report["replay"] = transport.stats
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            regressions = compare(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+
+import config_loader
+import quota
+from address_book import get_address_store
+from geocode import geocode_cache, lookup_coordinates
+from geocode_cache import normalize_address
+from http_client import QuotaExceeded
+
+QUOTA_SPENT = object()  # Result of a lookup refused because today's OpenCage budget is spent
+
+
+class RateLimiter:
+    """Space calls evenly so no more than `rate` start per second across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until the caller's slot comes up."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def read_address_file(path):
+    """Read one address per line, trying UTF-8 first like load_addresses does."""
+    try:
+        with open(path, "r", encoding="utf-8-sig") as file:
+            return file.read().splitlines()
+    except UnicodeDecodeError:
+        with open(path, "r", encoding="ISO-8859-1") as file:
+            return file.read().splitlines()
+
+
+def unique_addresses(lines, existing=()):
+    """Normalize and de-duplicate addresses (keeping first-seen order), dropping blanks and saved ones."""
+    seen = set(existing)
+    unique = []
+    for line in lines:
+        address = normalize_address(line)
+        if address and address not in seen:
+            seen.add(address)
+            unique.append(address)
+    return unique
+
+
+def quota_rate():
+    """Requests per second the OpenCage quota allows (1 on the free plan); 0 when the host isn't governed."""
+    host_quota = quota.get_quota(urlsplit(config_loader.open_cage_api()[1]).hostname)
+    return host_quota.rate if host_quota else 0
+
+
+def geocode_all(addresses, rate=None, max_workers=8):
+    """Geocode addresses concurrently; only cache misses count against the rate limit. Yields (address, result).
+
+    The OpenCage quota already spaces requests; `rate` can only slow them further. Once the daily
+    budget is spent the result is QUOTA_SPENT instead of a lookup.
+    """
+    limiter = RateLimiter(rate or 0)
+    spent = threading.Event()
+
+    def lookup(address):
+        hit, _ = geocode_cache.get(address)
+        if not hit:
+            if spent.is_set():
+                return QUOTA_SPENT  # Don't queue the rest behind a budget that is already gone
+            limiter.wait()  # Cached answers cost nothing upstream, so they skip the queue
+        try:
+            return lookup_coordinates(address)
+        except QuotaExceeded:
+            spent.set()
+            return QUOTA_SPENT
+        except requests.RequestException as e:
+            print(f"Error getting coordinates: {e}", file=sys.stderr)
+            return None, None, None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(lookup, address): address for address in addresses}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def import_addresses(path, rate=None, max_workers=8, dry_run=False):
+    """Import an address file into the address store; returns (imported, duplicates, failed, deferred) lists.
+
+    `deferred` holds the addresses left unlooked-up because the daily OpenCage budget ran out.
+    """
+    store = get_address_store()
+    candidates = [address for address in unique_addresses(read_address_file(path)) if address not in store]
+    print(f"{len(candidates)} new unique addresses to geocode.", file=sys.stderr)
+
+    results = {}
+    for address, result in geocode_all(candidates, rate, max_workers):
+        results[address] = result
+        if len(results) % 100 == 0:
+            print(f"Geocoded {len(results)}/{len(candidates)}", file=sys.stderr)
+
+    imported, duplicates, failed, deferred = [], [], [], []
+    seen = set()
+    for address in candidates:  # Walk in input order so the file keeps the order of the import list
+        if results[address] is QUOTA_SPENT:
+            deferred.append(address)  # Not looked up at all; importing the file again tomorrow picks it up
+            continue
+        formatted_address, lat, lng = results[address]
+        if not formatted_address or not lat or not lng:
+            failed.append(address)
+            continue
+        formatted_address_upper = formatted_address.upper()
+        if formatted_address_upper in store or formatted_address_upper in seen:
+            duplicates.append(address)  # Different spelling of an address we already have
+            continue
+        seen.add(formatted_address_upper)
+        imported.append((formatted_address_upper, lat, lng))
+
+    geocode_cache.save()
+    if imported and not dry_run:
+        store.add_many(reversed(imported))  # One transaction for the whole batch; first line of the file ends on top
+    return [address for address, _, _ in imported], duplicates, failed, deferred
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-import addresses into the saved address store.")
+    parser.add_argument("file", help="Text file with one address per line")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Max OpenCage requests per second, below the quota (default: the quota, 1/s on the free plan)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent lookups (default: 8)")
+    parser.add_argument("--dry-run", action="store_true", help="Geocode but don't save anything")
+    args = parser.parse_args(argv)
+
+    rate = quota_rate()
+    if args.rate and rate and args.rate > rate:
+        print(f"--rate {args.rate:g} is above the OpenCage quota; geocoding at {rate:g}/s.", file=sys.stderr)
+
+    imported, duplicates, failed, deferred = import_addresses(args.file, args.rate, args.workers, args.dry_run)
+    print(f"Imported {len(imported)}, duplicates {len(duplicates)}, not found {len(failed)}, "
+          f"left for tomorrow {len(deferred)}.")
+    for address in failed:
+        print(f"Not found: {address}", file=sys.stderr)
+    if deferred:
+        print(f"Daily OpenCage budget spent; run the import again after the reset for the remaining "
+              f"{len(deferred)} addresses.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import json
+import os
+import threading
+import time
+
+CONFIG_FILE = os.environ.get("WEATHER_CONFIG", "config.json")
+CHECK_INTERVAL = 1.0  # Seconds between mtime checks, so hot paths don't stat the file on every call
+DEFAULT_WEATHER_URL = "http://api.weatherapi.com/v1/current.json"
+DEFAULT_OPEN_CAGE_URL = "https://api.opencagedata.com/geocode/v1/json"
+
+_lock = threading.Lock()
+_config = None  # Last successfully parsed config
+_signature = None  # (mtime_ns, size) of the file _config came from
+_next_check = 0.0
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_config():
+    """Return the parsed config.json, re-reading it only when the file has changed since the last read."""
+    global _config, _signature, _next_check
+    path = CONFIG_FILE
+    now = time.monotonic()
+    with _lock:
+        if _config is not None and now < _next_check:
+            return _config
+        _next_check = now + CHECK_INTERVAL
+        signature = _file_signature(path)
+        if _config is not None and signature == _signature:
+            return _config
+        if signature is None:
+            _config, _signature = {}, None  # No file: every setting falls back to its default
+            return _config
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                config = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error reading {path}: {e}")  # Keep the last good config, e.g. while an editor is saving
+            if _config is None:
+                _config = {}
+            return _config
+        if _config is not None and _signature is not None:
+            print(f"Reloaded {path}")
+        _config, _signature = config, signature
+        return _config
+
+
+def get(key, default=None):
+    """Return one setting from config.json."""
+    return get_config().get(key, default)
+
+
+def weather_api():
+    """Return the weatherapi (key, url)."""
+    config = get_config()
+    return config.get("api_key", ""), config.get("url", DEFAULT_WEATHER_URL)
+
+
+def open_cage_api():
+    """Return the OpenCage (key, url)."""
+    config = get_config()
+    return config.get("open_cage_api_key", ""), config.get("open_cage_url", DEFAULT_OPEN_CAGE_URL)
+
+
+def reload():
+    """Force the next get_config() to check the file right away."""
+    global _next_check
+    with _lock:
+        _next_check = 0.0
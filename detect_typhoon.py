@@ -1,27 +1,31 @@
 import tkinter as tk
 from tkinter import ttk
-import requests
+import timezone_coords
 import time
 from datetime import datetime
-from geopy.distance import geodesic
-import pytz
-from threading import Thread
+from background import BackgroundWorker
+import metrics
+import config_loader
+import quota
+from observation import StationReport
+from spatial_index import geodesic_km
 
-# Configuration without address and OpenCage API key
-config = {
-    "api_key": "3d64780a9a2b44cbb4162710242812",
-    "url": "http://api.weatherapi.com/v1/current.json"
-}
+# requests, pytz and the alert pipeline are imported where first used so the window shows up immediately
 
 # Function to calculate distance between two lat-lng pairs (in km)
 def calculate_distance(lat1, lon1, lat2, lon2):
-    return geodesic((lat1, lon1), (lat2, lon2)).kilometers
+    return geodesic_km(lat1, lon1, lat2, lon2)
 
 
-# Function to get coordinates dynamically using OpenCage API for a given timezone
+# Function to get coordinates for a timezone: bundled table first, OpenCage only for zones it doesn't list
 def get_coordinates_from_timezone(timezone):
-    url = f"https://api.opencagedata.com/geocode/v1/json?q={timezone}&key=9bb391df378541a283fe99b321a33929"
-    response = requests.get(url)
+    coords = timezone_coords.lookup(timezone)
+    if coords:
+        return coords
+    import http_client
+    open_cage_api_key, open_cage_url = config_loader.open_cage_api()
+    url = f"{open_cage_url}?q={timezone}&key={open_cage_api_key}"
+    response = http_client.get(url)
     data = response.json()
     if data.get("results"):
         location = data["results"][0]
@@ -34,51 +38,32 @@ def get_coordinates_from_timezone(timezone):
 
 # Function to get weather data from WeatherAPI
 def get_weather_data(lat, lon, api_key):
-    url = f"{config['url']}?key={api_key}&q={lat},{lon}"
-    response = requests.get(url)
-
-    # Check if the response is successful
-    if response.status_code != 200:
-        raise Exception(f"Error: Unable to fetch weather data (status code {response.status_code})")
-
-    data = response.json()
-    return data
-
-
-# Function to get typhoons within a specified radius and classify Typhoon Level
-def get_typhoons_within_radius(lat, lon, radius_km=500):
-    url = f"{config['url']}?key={config['api_key']}&q={lat},{lon}&alerts=yes"
-    response = requests.get(url)
-    if response.status_code != 200:
-        raise Exception(f"Error: Unable to fetch typhoon data (status code {response.status_code})")
-
-    data = response.json()
-    nearby_typhoons = []
-    if 'alerts' in data:
-        for alert in data['alerts']:
-            typhoon_lat = alert.get('location', {}).get('lat', None)
-            typhoon_lon = alert.get('location', {}).get('lon', None)
-            if typhoon_lat and typhoon_lon:
-                distance = calculate_distance(lat, lon, typhoon_lat, typhoon_lon)
-                if distance <= radius_km:
-                    typhoon_info = {
-                        'headline': alert.get('headline', 'No Headline'),
-                        'description': alert.get('description', 'No Description'),
-                        'distance': distance
-                    }
-                    # Classify typhoon level based on distance or severity (simple categorization)
-                    if distance < 100:
-                        typhoon_info['level'] = 'Severe Typhoon (Very Close)'
-                    elif distance < 300:
-                        typhoon_info['level'] = 'Moderate Typhoon (Close)'
-                    else:
-                        typhoon_info['level'] = 'Weak Typhoon (Far)'
-                    nearby_typhoons.append(typhoon_info)
-    return nearby_typhoons
+    import requests
+    import weather_cache
+    from typhoon_alerts import ALERT_PARAMS
+    try:
+        # Served from cache until weatherapi can have a newer observation; the alert lookup that follows
+        # uses the same params and coordinates, so the whole cycle costs one call
+        return weather_cache.get_json(config_loader.weather_api()[1], lat, lon, {"key": api_key, **ALERT_PARAMS})
+    except requests.HTTPError as e:
+        raise Exception(f"Error: Unable to fetch weather data (status code {e.response.status_code})")
+
+
+# Async get_weather_data, for polling many points from one event loop
+async def get_weather_data_async(lat, lon, api_key):
+    import requests
+    import weather_cache
+    from typhoon_alerts import ALERT_PARAMS
+    try:
+        return await weather_cache.get_json_async(config_loader.weather_api()[1], lat, lon,
+                                                  {"key": api_key, **ALERT_PARAMS})
+    except requests.HTTPError as e:
+        raise Exception(f"Error: Unable to fetch weather data (status code {e.response.status_code})")
 
 
 # Function to extract weather data
 def extract_weather_data(weather_data):
+    import pytz
     location = weather_data.get('location', {})
     current = weather_data.get('current', {})
     city = location.get('name', 'Unknown')
@@ -97,46 +82,56 @@ def extract_weather_data(weather_data):
                                      "%Y-%m-%d %H:%M") if local_time != 'Unknown Time' else datetime.utcnow()
     current_time = current_time.astimezone(timezone_info).strftime('%Y-%m-%d %H:%M:%S')
 
-    return {
-        'location': f"{city}, {region}, {country}",
-        'lat': lat,
-        'lon': lon,
-        'temperature': temperature,
-        'wind_speed': wind_speed,
-        'humidity': humidity,
-        'pressure': pressure,
-        'timezone': timezone,
-        'current_time': current_time
-    }
-
-
-# Function to format weather data
-def format_weather_results(weather_data, radius_km=500):
+    return StationReport(
+        location=f"{city}, {region}, {country}",
+        lat=lat,
+        lon=lon,
+        temperature=temperature,
+        wind_speed=wind_speed,
+        humidity=humidity,
+        pressure=pressure,
+        timezone=timezone,
+        current_time=current_time,
+    )
+
+
+# Function to build the structured report (station conditions + nearby alerts) without any text formatting
+def build_typhoon_report(weather_data, radius_km=500):
+    from typhoon_alerts import get_typhoons_within_radius
     weather_info = extract_weather_data(weather_data)
-    lat, lon = weather_info['lat'], weather_info['lon']
-    nearby_typhoons = get_typhoons_within_radius(lat, lon, radius_km)
+    nearby_typhoons = get_typhoons_within_radius(weather_info.lat, weather_info.lon, radius_km)
+    return weather_info, nearby_typhoons
+
 
-    formatted_result = f"Location: {weather_info['location']}\n"
-    formatted_result += f"Local Time: {weather_info['current_time']}\n"
-    formatted_result += f"Timezone: {weather_info['timezone']}\n\n"
-    formatted_result += f"Temperature: {weather_info['temperature']} °C\n"
-    formatted_result += f"Wind Speed: {weather_info['wind_speed']} km/h\n"
-    formatted_result += f"Humidity: {weather_info['humidity']}%\n"
-    formatted_result += f"Pressure: {weather_info['pressure']} hPa\n\n"
+# Function to render a structured report as text
+def render_typhoon_report(weather_info, nearby_typhoons, radius_km=500):
+    formatted_result = f"Location: {weather_info.location}\n"
+    formatted_result += f"Local Time: {weather_info.current_time}\n"
+    formatted_result += f"Timezone: {weather_info.timezone}\n\n"
+    formatted_result += f"Temperature: {weather_info.temperature} °C\n"
+    formatted_result += f"Wind Speed: {weather_info.wind_speed} km/h\n"
+    formatted_result += f"Humidity: {weather_info.humidity}%\n"
+    formatted_result += f"Pressure: {weather_info.pressure} hPa\n\n"
 
     if nearby_typhoons:
         formatted_result += f"Nearby Typhoons (within {radius_km} km radius):\n"
         for typhoon in nearby_typhoons:
-            formatted_result += f"Headline: {typhoon['headline']}\n"
-            formatted_result += f"Description: {typhoon['description']}\n"
-            formatted_result += f"Distance: {typhoon['distance']:.2f} km\n"
-            formatted_result += f"Typhoon Level: {typhoon['level']}\n\n"
+            formatted_result += f"Headline: {typhoon.headline}\n"
+            formatted_result += f"Description: {typhoon.description}\n"
+            formatted_result += f"Distance: {typhoon.distance:.2f} km\n"
+            formatted_result += f"Typhoon Level: {typhoon.level}\n\n"
     else:
         formatted_result += f"No typhoons found within {radius_km} km radius.\n"
 
     return formatted_result
 
 
+# Function to format weather data
+def format_weather_results(weather_data, radius_km=500):
+    weather_info, nearby_typhoons = build_typhoon_report(weather_data, radius_km)
+    return render_typhoon_report(weather_info, nearby_typhoons, radius_km)
+
+
 # Function to wrap the text output word by word
 def wrap_text(text, max_length=40):
     words = text.split(' ')
@@ -153,27 +148,57 @@ def wrap_text(text, max_length=40):
     return wrapped_text
 
 
-# Function to refresh weather data and update the textbox
-def refresh_weather_data(textbox, timezone_combobox, radius_list, index, progress_bar):
-    try:
-        # Get the selected timezone
-        timezone = timezone_combobox.get()
+# Background worker so the three HTTP calls per cycle never block the Tk loop
+worker = BackgroundWorker(name="detect_typhoon")
+
+
+# Function to fetch and format the typhoon report for a timezone (runs on a worker thread)
+def fetch_typhoon_report(timezone, radius_km, priority=quota.USER):
+    with quota.priority(priority):  # Scheduled cycles queue behind user-initiated requests
         # Get coordinates for the selected timezone
         lat, lon = get_coordinates_from_timezone(timezone)
 
         # Get weather data
-        weather_data = get_weather_data(lat, lon, config['api_key'])
+        weather_data = get_weather_data(lat, lon, config_loader.weather_api()[0])
 
         # Format and wrap results
-        formatted_result = format_weather_results(weather_data, radius_list[index])
-        wrapped_result = wrap_text(formatted_result)
+        formatted_result = format_weather_results(weather_data, radius_km)
+    return wrap_text(formatted_result)
+
 
+refresh_in_flight = False  # True while a background typhoon report is being fetched
+
+
+# Function to refresh weather data and update the textbox
+def refresh_weather_data(textbox, timezone_combobox, radius_list, index, progress_bar, priority=quota.USER):
+    global refresh_in_flight
+    if refresh_in_flight:
+        metrics.inc("refresh_skipped_total", app="detect_typhoon")
+        return  # Previous report is still waiting on the network; don't pile up requests
+    refresh_in_flight = True
+    # Get the selected timezone on the UI thread, then fetch in the background
+    timezone = timezone_combobox.get()
+    started = time.perf_counter()
+
+    def show_result(wrapped_result):
+        global refresh_in_flight
+        refresh_in_flight = False
         # Update the textbox with the wrapped results
+        render_started = time.perf_counter()
         textbox.delete(1.0, tk.END)
         textbox.insert(tk.END, wrapped_result)
+        finished = time.perf_counter()
+        metrics.observe("render_seconds", finished - render_started, app="detect_typhoon")
+        metrics.observe("refresh_cycle_seconds", finished - started, app="detect_typhoon", result="ok")
 
-    except Exception as e:
+    def show_error(e):
+        global refresh_in_flight
+        refresh_in_flight = False
         textbox.insert(tk.END, f"Error occurred: {e}\n")
+        metrics.observe("refresh_cycle_seconds", time.perf_counter() - started, app="detect_typhoon", result="error")
+
+    worker.submit(fetch_typhoon_report, timezone, radius_list[index], priority, callback=show_result,
+                  error_callback=show_error)
 
 
 # Global control variable for fetch state
@@ -195,15 +220,17 @@ def update_progress_bar(progress_bar, cycle_time=30):
 
 
 # Function to cycle through radius values every cycle_time seconds
-def cycle_radius(textbox, timezone_combobox, radius_list, index, progress_bar, cycle_time=30):
+def cycle_radius(textbox, timezone_combobox, radius_list, index, progress_bar, cycle_time=30, background=False):
     if not fetch_running:  # Stop cycling if fetching is disabled
         return
 
-    refresh_weather_data(textbox, timezone_combobox, radius_list, index, progress_bar)
+    refresh_weather_data(textbox, timezone_combobox, radius_list, index, progress_bar,
+                         quota.BACKGROUND if background else quota.USER)
 
-    # Schedule the next cycle
+    # Schedule the next cycle, stretched when the day's weatherapi budget can't keep up (1 call per cycle)
     next_index = (index + 1) % len(radius_list)
-    progress_bar.after(cycle_time * 1000, cycle_radius, textbox, timezone_combobox, radius_list, next_index, progress_bar, cycle_time)
+    delay = quota.stretch_interval("detect_typhoon", cycle_time)
+    progress_bar.after(int(delay * 1000), cycle_radius, textbox, timezone_combobox, radius_list, next_index, progress_bar, cycle_time, True)
 
 
 # Function to toggle start/stop for fetching
@@ -224,8 +251,16 @@ def toggle_fetch(textbox, window, progress_bar, timezone_combobox, radius_list,
 
 
 
+# Function to fill the timezone list on first use
+def fill_timezones(timezone_combobox):
+    if len(timezone_combobox["values"]) <= 1:
+        import pytz
+        timezone_combobox["values"] = pytz.all_timezones
+
+
 # Function to create the GUI
 def create_gui():
+    metrics.start_exporters()  # Only when WEATHER_METRICS_PORT / WEATHER_METRICS_FILE are set
     window = tk.Tk()
     window.title("Typhoon Detection Results")
     window.geometry("500x640")
@@ -244,9 +279,10 @@ def create_gui():
     timezone_frame.grid(row=1, column=0, pady=10, sticky="w")
     timezone_label = tk.Label(timezone_frame, text="Select Timezone:", bg="#f0f0f0", font=("Arial", 10))
     timezone_label.pack(side="left")
-    all_timezones = pytz.all_timezones
-    timezone_combobox = ttk.Combobox(timezone_frame, values=all_timezones, state="readonly", font=("Arial", 10))
+    timezone_combobox = ttk.Combobox(timezone_frame, values=["Asia/Manila"], state="readonly", font=("Arial", 10))
     timezone_combobox.set("Asia/Manila")  # Default timezone
+    # The ~600 zone names are only loaded the first time the list is opened
+    timezone_combobox.config(postcommand=lambda: fill_timezones(timezone_combobox))
     timezone_combobox.pack(side="left", padx=10)
 
     # Button for starting/stopping weather data fetching
@@ -257,8 +293,12 @@ def create_gui():
     progress_bar = ttk.Progressbar(main_frame, length=300, mode='determinate')
     progress_bar.grid(row=2, column=0, columnspan=2, pady=10)
 
+    # Hand finished background fetches to the UI
+    worker.poll(window)
+
     window.mainloop()
 
 
 # Run the GUI
-create_gui()
+if __name__ == "__main__":
+    create_gui()
@@ -0,0 +1,152 @@
+import math
+import threading
+from collections import OrderedDict
+from datetime import date as date_type, datetime, time as time_type, timedelta
+
+import pytz
+
+from observation import SolarDay
+
+DAYS_AHEAD = 366  # One table covers a full year from the day it was built
+MIN_SITES = 256  # Sites kept before the cache is sized from the saved-site count
+SUNRISE_ZENITH = 90.833  # Refraction plus the sun's radius, as used for published sunrise tables
+SYNODIC_MONTH = 29.530588853  # Days
+REFERENCE_NEW_MOON = datetime(2000, 1, 6, 18, 14, tzinfo=pytz.utc)
+MOON_PHASES = (  # (upper bound of the moon's age in days, name as weatherapi spells it)
+    (1.84566, "New Moon"),
+    (5.53699, "Waxing Crescent"),
+    (9.22831, "First Quarter"),
+    (12.91963, "Waxing Gibbous"),
+    (16.61096, "Full Moon"),
+    (20.30228, "Waning Gibbous"),
+    (23.99361, "Last Quarter"),
+    (27.68493, "Waning Crescent"),
+    (SYNODIC_MONTH, "New Moon"),
+)
+
+
+def equation_of_time(day_of_year):
+    """Equation of time in minutes for a day of the year (rounded to 2 decimals)."""
+    b = math.radians((360 / 365) * (day_of_year - 81))
+    eot = 229.18 * (0.000075 + 0.001868 * math.cos(b) - 0.032077 * math.sin(b)
+                    - 0.014615 * math.cos(2 * b) - 0.040849 * math.sin(2 * b))
+    return round(eot, 2)
+
+
+EQUATION_OF_TIME = [equation_of_time(day_of_year) for day_of_year in range(367)]  # Indexed by day of year
+
+
+def solar_noon_minutes(longitude, day_of_year):
+    """Solar noon in minutes from midnight, measured against the fixed 15° meridian the app has always used."""
+    return 12 * 60 - (longitude - 15) * 4 + EQUATION_OF_TIME[day_of_year]
+
+
+def sun_events_utc(lat, lng, day):
+    """Return (sunrise, sunset) in minutes after UTC midnight of `day`, or None for polar day/night."""
+    gamma = 2 * math.pi / 365 * (day.timetuple().tm_yday - 1)  # Fractional year at noon
+    eqtime = 229.18 * (0.000075 + 0.001868 * math.cos(gamma) - 0.032077 * math.sin(gamma)
+                       - 0.014615 * math.cos(2 * gamma) - 0.040849 * math.sin(2 * gamma))
+    decl = (0.006918 - 0.399912 * math.cos(gamma) + 0.070257 * math.sin(gamma)
+            - 0.006758 * math.cos(2 * gamma) + 0.000907 * math.sin(2 * gamma)
+            - 0.002697 * math.cos(3 * gamma) + 0.00148 * math.sin(3 * gamma))
+    phi = math.radians(lat)
+    cos_ha = (math.cos(math.radians(SUNRISE_ZENITH)) / (math.cos(phi) * math.cos(decl))
+              - math.tan(phi) * math.tan(decl))
+    if cos_ha > 1 or cos_ha < -1:
+        return None  # The sun never rises (or never sets) that day
+    ha = math.degrees(math.acos(cos_ha))
+    return 720 - 4 * (lng + ha) - eqtime, 720 - 4 * (lng - ha) - eqtime
+
+
+def moon_phase(moment):
+    """Name of the moon phase at an aware datetime."""
+    age = ((moment - REFERENCE_NEW_MOON).total_seconds() / 86400) % SYNODIC_MONTH
+    for bound, name in MOON_PHASES:
+        if age < bound:
+            return name
+    return MOON_PHASES[-1][1]
+
+
+def site_timezone(timezone, lng):
+    """Return the pytz zone for a site, approximating it from the longitude when the tz name is unknown."""
+    if timezone:
+        try:
+            return pytz.timezone(timezone)
+        except pytz.UnknownTimeZoneError:
+            pass
+    offset = max(-12, min(12, round(lng / 15)))
+    return pytz.timezone(f"Etc/GMT{-offset:+d}" if offset else "UTC")  # Etc/GMT signs are inverted
+
+
+def _clock(utc_midnight, minutes, tz):
+    return (utc_midnight + timedelta(minutes=minutes)).astimezone(tz).strftime("%I:%M %p")
+
+
+class SiteEphemeris:
+    """A year of SolarDay rows for one site, each computed the first time its date is asked for."""
+
+    def __init__(self, lat, lng, timezone=None, start=None, days=DAYS_AHEAD):
+        self.lat, self.lng = lat, lng
+        self.tz = site_timezone(timezone, lng)
+        self.start = start or date_type.today()
+        self.days = [None] * days  # A refresh only ever pays for the day it shows
+
+    def _build(self, day):
+        utc_midnight = datetime.combine(day, time_type(), tzinfo=pytz.utc)
+        events = sun_events_utc(self.lat, self.lng, day)
+        if events is None:
+            sunrise, sunset = "No sunrise", "No sunset"
+        else:
+            sunrise, sunset = _clock(utc_midnight, events[0], self.tz), _clock(utc_midnight, events[1], self.tz)
+        local_noon = self.tz.localize(datetime.combine(day, time_type(12)))
+        return SolarDay(
+            date=day.isoformat(),
+            solar_noon_minutes=solar_noon_minutes(self.lng, day.timetuple().tm_yday),
+            sunrise=sunrise,
+            sunset=sunset,
+            moon_phase=moon_phase(local_noon),
+        )
+
+    def get(self, day):
+        """Return the SolarDay for a date, or None when it falls outside this table."""
+        offset = (day - self.start).days
+        if not 0 <= offset < len(self.days):
+            return None
+        entry = self.days[offset]
+        if entry is None:
+            entry = self.days[offset] = self._build(day)  # Racing threads build identical rows
+        return entry
+
+
+_sites = OrderedDict()  # (lat, lng, timezone) -> SiteEphemeris
+_lock = threading.Lock()
+
+
+def solar_day(lat, lng, day=None, timezone=None):
+    """Return the SolarDay of a site; its year table is built on first use and again once the date runs past it."""
+    day = day or date_type.today()
+    if isinstance(day, datetime):
+        day = day.date()
+    key = (lat, lng, timezone)  # Saved sites keep their exact coordinates, so solar noon matches to the digit
+    with _lock:
+        site = _sites.get(key)
+        if site is not None:
+            _sites.move_to_end(key)
+            entry = site.get(day)
+            if entry is not None:
+                return entry
+    site = SiteEphemeris(lat, lng, timezone, start=day)
+    with _lock:
+        _sites[key] = site
+        _sites.move_to_end(key)
+        if len(_sites) > MIN_SITES:
+            limit = max_sites()
+            while len(_sites) > limit:
+                _sites.popitem(last=False)
+    return site.get(day)
+
+
+def max_sites():
+    """Sites to keep: room for every saved address (and as many ad-hoc lookups), at least MIN_SITES."""
+    from address_book import get_address_store
+    return max(MIN_SITES, 2 * len(get_address_store()))
@@ -1,11 +1,14 @@
-import requests
+import forecast
+import ephemeris
 from rain_stat import load_weather_config, get_rain_message, detect_typhoon_level
-import pytz
-import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from observation import WeatherObservation
 
-# Load weather API configuration
-weather_api_key, weather_url = load_weather_config()
+
+def get_weather_config():
+    """Return the weather API (key, url); config_loader caches it and reloads it when config.json changes."""
+    return load_weather_config()
 
 def wind_direction_to_degrees(wind_dir):
     """Convert wind direction from cardinal to degrees."""
@@ -17,41 +20,17 @@ def wind_direction_to_degrees(wind_dir):
 
 
 def equation_of_time(date):
-    """Calculate the equation of time (EoT) for a given date."""
-    # Constants for calculation
-    day_of_year = date.timetuple().tm_yday  # Day of the year (1 to 365)
-
-    # Calculate omega (angle in degrees)
-    omega = (360 / 365) * (day_of_year - 81)
-
-    # Convert omega to radians for the trigonometric functions
-    omega_rad = math.radians(omega)
-
-    # Simple approximation formula for the Equation of Time (EoT) in minutes
-    EoT = 229.18 * (0.000075 + 0.001868 * math.cos(omega_rad) - 0.032077 * math.sin(omega_rad)
-                    - 0.014615 * math.cos(2 * omega_rad) - 0.040849 * math.sin(2 * omega_rad))
-
-    return EoT
-
-
-def calculate_solar_noon(longitude, date, timezone="UTC"):
-    """Calculate solar noon time based on longitude, date, and timezone."""
-    # Constants
-    standard_meridian = 15  # Every 15° longitude corresponds to 1-hour difference in time
-    EoT = equation_of_time(date)  # Equation of time (in minutes)
+    """Calculate the equation of time (in minutes) for a specific date."""
+    return ephemeris.EQUATION_OF_TIME[date.timetuple().tm_yday]  # Precomputed for every day of the year
 
-    # Time zone correction (adjust for local longitude)
-    time_offset = (longitude - standard_meridian) * 4  # in minutes
 
-    # Convert the input date to UTC if it's not already
-    utc_date = date.astimezone(pytz.utc)
+def solar_noon_minutes(longitude, date):
+    """Return local solar noon in minutes from midnight for a longitude and date."""
+    return ephemeris.solar_noon_minutes(longitude, date.timetuple().tm_yday)
 
-    # Adjust for the timezone
-    tz = pytz.timezone(timezone)
-    local_time = utc_date.astimezone(tz)
 
-    # Local time of solar noon
-    solar_noon_time = 12 * 60 - time_offset + EoT  # in minutes from midnight
+def format_solar_noon(solar_noon_time):
+    """Render solar noon (minutes from midnight) as HH:MM."""
     solar_noon_hour = solar_noon_time // 60
     solar_noon_minute = solar_noon_time % 60
 
@@ -64,23 +43,17 @@ def calculate_solar_noon(longitude, date, timezone="UTC"):
     return solar_noon_time_corrected.strftime("%H:%M")
 
 
-def equation_of_time(date):
-    """Calculate the equation of time (in minutes) for a specific date."""
-    # Extract day of year (DOY) from the date
-    doy = date.timetuple().tm_yday
-
-    # Equation of Time formula (simplified version)
-    b = (360 / 365) * (doy - 81)  # Approximation factor
-    EoT = 229.18 * (0.000075 + 0.001868 * math.cos(math.radians(b)) - 0.032077 * math.sin(
-        math.radians(b)) - 0.014615 * math.cos(2 * math.radians(b)) - 0.040849 * math.sin(2 * math.radians(b)))
-
-    return round(EoT, 2)  # Return equation of time in minutes
+def calculate_solar_noon(longitude, date, timezone="UTC"):
+    """Calculate solar noon time based on longitude, date, and timezone."""
+    # Solar noon is measured against a fixed meridian, so the timezone doesn't change the result
+    return format_solar_noon(solar_noon_minutes(longitude, date))
 
 
-def calculate_wind_chill(temp_c, wind_kph, humidity=None, cloud_cover=None, cloud_type=None, cloud_altitude=None,
-                         is_night=False, region="default"):
+def compute_wind_chill(temp_c, wind_kph, humidity=None, cloud_cover=None, cloud_type=None, cloud_altitude=None,
+                       is_night=False, region="default"):
+    """Return the wind chill / felt temperature in °C, or None when the wind is too light to matter."""
     if wind_kph < 4.8:
-        return "Not Applicable (Wind < 4.8 kph)"  # Wind chill is not applicable for very light wind
+        return None  # Wind chill is not applicable for very light wind
 
     # Convert wind speed from kph to mph for wind chill formula
     wind_mph = wind_kph * 0.621371
@@ -92,7 +65,7 @@ def calculate_wind_chill(temp_c, wind_kph, humidity=None, cloud_cover=None, clou
 
         # Convert back to Celsius for more usable output
         wind_chill_c = (wind_chill_f - 32) * 5 / 9  # Fahrenheit to Celsius conversion
-        return f"Feels Like: {round(wind_chill_c, 2)}°C"
+        return wind_chill_c
 
     else:
         # Apply cooling effect for temperatures above 10°C
@@ -158,19 +131,42 @@ def calculate_wind_chill(temp_c, wind_kph, humidity=None, cloud_cover=None, clou
         elif wind_kph > 10:
             cooling_effect -= 0.5  # Light winds (10-20 kph) cause a slight additional cooling
 
-        # Add note for strong wind cooling effect if wind speed is greater than 15 kph
-        effect_text = " (strong wind cooling effect)" if wind_kph > 15 else ""
+        return cooling_effect
 
-        return f"Feels Like: {round(cooling_effect, 2)}°C{effect_text}"
 
+def calculate_wind_chill(temp_c, wind_kph, humidity=None, cloud_cover=None, cloud_type=None, cloud_altitude=None,
+                         is_night=False, region="default"):
+    """Describe the wind chill for display."""
+    wind_chill_c = compute_wind_chill(temp_c, wind_kph, humidity, cloud_cover, cloud_type, cloud_altitude,
+                                      is_night, region)
+    return format_wind_chill(wind_chill_c, temp_c, wind_kph)
 
 
-def calculate_hsi(temp_c, humidity):
-    """Calculate the Heat Stress Index (HSI) based on temperature and humidity."""
+def format_wind_chill(wind_chill_c, temp_c, wind_kph):
+    """Render a wind chill value the way calculate_wind_chill always has."""
+    if wind_chill_c is None:
+        return "Not Applicable (Wind < 4.8 kph)"
+    # Add note for strong wind cooling effect if wind speed is greater than 15 kph (only above 10°C)
+    effect_text = " (strong wind cooling effect)" if temp_c > 10 and wind_kph > 15 else ""
+    return f"Feels Like: {round(wind_chill_c, 2)}°C{effect_text}"
+
+
+# Heat Stress Index categories, indexed by category code
+HSI_LABELS = (
+    "No significant Heat Stress",
+    "Low Heat Stress (Normal)",
+    "Moderate Heat Stress (Caution)",
+    "High Heat Stress (Take caution)",
+    "Extreme Heat Stress (Dangerous)",
+)
+
+
+def heat_index(temp_c, humidity):
+    """Return (heat index in °C, HSI category code), or (None, None) when too cool or dry for heat stress."""
 
     # Skip calculation if temperature or humidity is too low for significant heat stress
     if temp_c < 26.67 or humidity < 40:  # equivalent to 80°F
-        return "HSI N/A (temp. & humidity too low!)"
+        return None, None
 
     # Convert Celsius to Fahrenheit for the formula
     temp_f = (temp_c * 9 / 5) + 32
@@ -188,108 +184,214 @@ def calculate_hsi(temp_c, humidity):
 
     # Categorize the result based on Heat Index
     if HI_fahrenheit > 130:
-        return f"HSI: {round(HI_celsius, 2)}°C - Extreme Heat Stress (Dangerous)"
+        return HI_celsius, 4
     if HI_fahrenheit > 105:
-        return f"HSI: {round(HI_celsius, 2)}°C - High Heat Stress (Take caution)"
+        return HI_celsius, 3
     if HI_fahrenheit > 90:
-        return f"HSI: {round(HI_celsius, 2)}°C - Moderate Heat Stress (Caution)"
+        return HI_celsius, 2
     if HI_fahrenheit > 80:
-        return f"HSI: {round(HI_celsius, 2)}°C - Low Heat Stress (Normal)"
+        return HI_celsius, 1
+    return HI_celsius, 0
 
-    return f"HSI: {round(HI_celsius, 2)}°C - No significant Heat Stress"
 
+def format_hsi(hsi_c, hsi_category):
+    """Render a heat index and its category the way calculate_hsi always has."""
+    if hsi_c is None:
+        return "HSI N/A (temp. & humidity too low!)"
+    return f"HSI: {round(hsi_c, 2)}°C - {HSI_LABELS[hsi_category]}"
 
-def get_weather(lat, lng):
-    """Fetch weather data including moon phase."""
+
+def calculate_hsi(temp_c, humidity):
+    """Calculate the Heat Stress Index (HSI) based on temperature and humidity."""
+    return format_hsi(*heat_index(temp_c, humidity))
+
+
+FORECAST_URL = forecast.FORECAST_URL
+
+
+def fetch_forecast(lat, lng):
+    """Fetch the raw forecast payload for a point; its hourly part is merged into the forecast store as well."""
+    return forecast.fetch_forecast(lat, lng, get_weather_config()[0])
+
+
+async def fetch_forecast_async(lat, lng):
+    """Async fetch_forecast."""
+    return await forecast.fetch_forecast_async(lat, lng, get_weather_config()[0])
+
+
+def format_forecast_warning(outlook):
+    """Render a lead-time warning for the worst forecast hour, or "" when no typhoon level is forecast."""
+    if not outlook or not outlook["typhoon_level"]:
+        return ""
+    return (f"\n⏰ Forecast in {outlook['lead_hours']} h ({outlook['time']}): "
+            f"{outlook['precip_mm']} mm, {outlook['wind_kph']} kph{outlook['typhoon_level']}\n")
+
+
+def _number(value):
+    """Return a numeric value unchanged, or None for missing/"N/A" values."""
+    return value if isinstance(value, (int, float)) else None
+
+
+def derive_weather(data, lat, lng, location="", today=None):
+    """Build a WeatherObservation from a forecast payload; None if the payload is incomplete."""
+    if "current" not in data or "forecast" not in data:
+        return None
+
+    today = today or datetime.now()
+    current = data["current"]
+    forecast_days = data["forecast"].get("forecastday") or [{}]
+    astro = forecast_days[0].get("astro") or {}
+    # Precomputed for the site's year; also fills in sunrise/sunset/moon phase when astro is missing
+    solar = ephemeris.solar_day(lat, lng, today, data.get("location", {}).get("tz_id"))
+
+    # Extract current weather data
+    temp_c = current["temp_c"]
+    humidity = current["humidity"]
+    wind_kph = current["wind_kph"]
+    wind_dir = current["wind_dir"]
+    hsi_c, hsi_category = heat_index(temp_c, humidity)  # Heat Stress Index
+    wind_dir_degrees = wind_direction_to_degrees(wind_dir)
+
+    return WeatherObservation(
+        location=location or data.get("location", {}).get("name", ""),
+        lat=lat,
+        lng=lng,
+        observed_epoch=current.get("last_updated_epoch", int(today.timestamp())),
+        temp_c=temp_c,
+        feels_like_c=_number(current.get("feelslike_c")),
+        humidity=humidity,
+        wind_kph=wind_kph,
+        wind_dir=wind_dir,
+        wind_dir_degrees=_number(wind_dir_degrees),
+        wind_gust_kph=_number(current.get("gust_kph")),
+        cloud_cover=_number(current.get("cloud")),
+        precip_mm=current.get("precip_mm", 0),
+        uv_index=_number(current.get("uv")),
+        visibility_km=_number(current.get("vis_km")),
+        pressure_mb=_number(current.get("pressure_mb")),
+        condition=current["condition"]["text"],
+        sunrise=astro.get("sunrise") or solar.sunrise,
+        sunset=astro.get("sunset") or solar.sunset,
+        moon_phase=astro.get("moon_phase") or solar.moon_phase,
+        solar_noon_minutes=solar.solar_noon_minutes,  # Calculated since the API doesn't provide it
+        wind_chill_c=compute_wind_chill(temp_c, wind_kph),
+        hsi_c=hsi_c,
+        hsi_category=hsi_category,
+    )
+
+
+def _show(value):
+    """Render a missing value as N/A, like the API-derived text always has."""
+    return "N/A" if value is None else value
+
+
+def format_weather(obs):
+    """Render a WeatherObservation into the text shown in the GUI."""
+    # Icons based on conditions
+    condition_icons = {
+        "Clear": "🌞",
+        "Partly cloudy": "⛅",
+        "Cloudy": "☁️",
+        "Rain": "🌧",
+        "Snow": "❄️",
+        "Wind": "💨",
+        "Thunderstorm": "🌩",
+        "Fog": "🌫",
+        "Drizzle": "🌦",
+    }
+
+    condition_icon = condition_icons.get(obs.condition, "🌥")  # Default to "partly cloudy" if unknown
+    sunrise, sunset = _show(obs.sunrise), _show(obs.sunset)
+
+    # Returning formatted weather data with moon phase and icons
+    return (
+        f"🌡 Temperature: {obs.temp_c}°C (Feels Like: {_show(obs.feels_like_c)}°C)\n"
+        f"💨 Wind: {obs.wind_kph} kph (Direction: {obs.wind_dir} - {_show(obs.wind_dir_degrees)}°)\n\n"
+        f"🌪 Wind Gusts: {_show(obs.wind_gust_kph)} kph\n"
+        f"❄ Wind Chill: {format_wind_chill(obs.wind_chill_c, obs.temp_c, obs.wind_kph)}\n"
+        f"☁ Cloud Cover: {_show(obs.cloud_cover)}%\n"
+        f"🌞 UV Index: {_show(obs.uv_index)}\n"
+        f"👀 Visibility: {_show(obs.visibility_km)} km\n\n"
+        f"🔽 Pressure: {_show(obs.pressure_mb)} mb\n\n"
+        f"⏳ Daylight Duration: {sunset} - {sunrise}\n"
+        f"🕛 Solar Noon: {format_solar_noon(obs.solar_noon_minutes)}\n\n"
+
+        f"{format_hsi(obs.hsi_c, obs.hsi_category)}\n\n"
+        f"🌕 Moon Phase: {_show(obs.moon_phase)}\n"
+        f"🌅 Sunrise: {sunrise}\n"
+        f"🌇 Sunset: {sunset}\n\n"
+        f"💧 Humidity: {obs.humidity}%\n"
+        f"🌧 Precipitation: {obs.precip_mm} mm\n\n"
+        f"🌦 Fetched: {obs.condition}\n"
+        f"🌧 Calculated: {get_rain_message(obs.precip_mm)}\n\n"
+        f"🌪 Typhoon Level: {detect_typhoon_level(obs.precip_mm, obs.wind_kph)}\n"
+    )
+
+
+def get_observation(lat, lng, location=""):
+    """Fetch and derive the current WeatherObservation for a point; None if the payload is incomplete."""
+    return derive_weather(fetch_forecast(lat, lng), lat, lng, location)
+
+
+def get_weather(lat, lng, location="", store=None):
+    """Fetch weather data including moon phase, optionally appending the observation to an ObservationStore."""
+    weather_api_key, weather_url = get_weather_config()
     if not weather_api_key or not weather_url:
         return "Weather API key or URL is missing."
 
     try:
-        # Store current time once and reuse it
-        today = datetime.now()
-
-        # Make the request to the weather API
-        request_url = f"http://api.weatherapi.com/v1/forecast.json?key={weather_api_key}&q={lat},{lng}&days=1&aqi=no&alerts=no"
-        response = requests.get(request_url)
-        data = response.json()
-
-        if "current" in data and "forecast" in data:
-            current = data["current"]
-            forecast = data["forecast"]["forecastday"][0]
-            astro = forecast["astro"]
-
-            # Extract current weather data
-            temp_c = current["temp_c"]
-            feels_like_c = current.get("feelslike_c", "N/A")
-            condition = current["condition"]["text"]
-            humidity = current["humidity"]
-            wind_kph = current["wind_kph"]
-            wind_dir = current["wind_dir"]
-            wind_gust_kph = current.get("gust_kph", "N/A")
-            cloud_cover = current.get("cloud", "N/A")
-            precip_mm = current.get("precip_mm", 0)
-            uv_index = current.get("uv", "N/A")
-            visibility_km = current.get("vis_km", "N/A")
-            pressure_mb = current.get("pressure_mb", "N/A")
-
-            # Get the wind chill calculation
-            wind_chill = calculate_wind_chill(temp_c, wind_kph)
-
-            # Calculate HSI (Heat Stress Index)
-            hsi = calculate_hsi(temp_c, humidity)
-
-            # Calculate solar noon if not available from the API
-            solar_noon = calculate_solar_noon(lng, today)  # Use the pre-defined function for this
-
-            # Get wind direction in degrees
-            wind_dir_degrees = wind_direction_to_degrees(wind_dir)
-
-            # Moon phase
-            moon_phase = astro.get("moon_phase", "N/A")
-
-            # Icons based on conditions
-            condition_icons = {
-                "Clear": "🌞",
-                "Partly cloudy": "⛅",
-                "Cloudy": "☁️",
-                "Rain": "🌧",
-                "Snow": "❄️",
-                "Wind": "💨",
-                "Thunderstorm": "🌩",
-                "Fog": "🌫",
-                "Drizzle": "🌦",
-            }
-
-            condition_icon = condition_icons.get(condition, "🌥")  # Default to "partly cloudy" if unknown
-
-            # Returning formatted weather data with moon phase and icons
-            return (
-                f"🌡 Temperature: {temp_c}°C (Feels Like: {feels_like_c}°C)\n"
-                f"💨 Wind: {wind_kph} kph (Direction: {wind_dir} - {wind_dir_degrees}°)\n\n"
-                f"🌪 Wind Gusts: {wind_gust_kph} kph\n"
-                f"❄ Wind Chill: {wind_chill}\n"
-                f"☁ Cloud Cover: {cloud_cover}%\n"
-                f"🌞 UV Index: {uv_index}\n"
-                f"👀 Visibility: {visibility_km} km\n\n"
-                f"🔽 Pressure: {pressure_mb} mb\n\n"
-                f"⏳ Daylight Duration: {astro.get('sunset', 'N/A')} - {astro.get('sunrise', 'N/A')}\n"
-                f"🕛 Solar Noon: {solar_noon}\n\n"
-
-                f"{hsi}\n\n"
-                f"🌕 Moon Phase: {moon_phase}\n"
-                f"🌅 Sunrise: {astro.get('sunrise', 'N/A')}\n"
-                f"🌇 Sunset: {astro.get('sunset', 'N/A')}\n\n"
-                f"💧 Humidity: {humidity}%\n"
-                f"🌧 Precipitation: {precip_mm} mm\n\n"
-                f"🌦 Fetched: {condition}\n"
-                f"🌧 Calculated: {get_rain_message(precip_mm)}\n\n"
-                f"🌪 Typhoon Level: {detect_typhoon_level(precip_mm, wind_kph)}\n"
-            )
-        else:
-            return "Weather data not available."
+        return weather_report(fetch_forecast(lat, lng), lat, lng, location, store)
+    except Exception as e:
+        return f"Error fetching weather data: {e}"
+
 
+async def get_weather_async(lat, lng, location="", store=None):
+    """Async get_weather; only the fetch differs, the report is built by the same code."""
+    weather_api_key, weather_url = get_weather_config()
+    if not weather_api_key or not weather_url:
+        return "Weather API key or URL is missing."
+
+    try:
+        return weather_report(await fetch_forecast_async(lat, lng), lat, lng, location, store)
     except Exception as e:
         return f"Error fetching weather data: {e}"
 
 
+def weather_report(payload, lat, lng, location="", store=None):
+    """Derive, store and render the weather text for a fetched forecast payload."""
+    # Store current time once and reuse it
+    today = datetime.now()
+
+    observation = derive_weather(payload, lat, lng, location, today)
+    if observation is None:
+        return "Weather data not available."
+    if store is not None:
+        store.record(observation)  # Skipped by the store when it's the same upstream observation; errors are logged
+    # Text is only built for callers that display it; the warning only appears when a level is forecast
+    return format_weather(observation) + format_forecast_warning(forecast.outlook(lat, lng))
+
+
+def get_weather_many(locations, max_workers=8, store=None):
+    """Fetch weather for many (label, lat, lng) locations concurrently, yielding (label, result) as each completes."""
+    locations = list(locations)
+    if not locations:
+        return
+    # Bounded pool: total latency is roughly that of the slowest site instead of the sum of all sites
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(locations))) as executor:
+        futures = {executor.submit(get_weather, lat, lng, label, store): label for label, lat, lng in locations}
+        for future in as_completed(futures):
+            yield futures[future], future.result()  # get_weather reports its own errors as text
+
+
+async def get_weather_many_async(locations, store=None):
+    """Async get_weather_many: one task per location on a single thread, bounded by async_client's pool.
+
+    Yields (label, result) as each completes.
+    """
+    import asyncio
+
+    async def labelled(label, lat, lng):
+        return label, await get_weather_async(lat, lng, label, store)
 
+    for task in asyncio.as_completed([labelled(label, lat, lng) for label, lat, lng in locations]):
+        yield await task
@@ -0,0 +1,208 @@
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+import weather_cache
+import thresholds
+
+FORECAST_URL = "http://api.weatherapi.com/v1/forecast.json"
+FORECAST_DAYS = 3  # Hourly horizon requested per fetch (the free weatherapi plan allows up to 3 days)
+OUTLOOK_HOURS = 24  # How far ahead the automatic rain/typhoon outlook looks
+HOURLY_FIELDS = ("precip_mm", "wind_kph", "gust_kph", "chance_of_rain", "temp_c")
+KEEP_PAST_HOURS = 1  # The hour in progress stays until it has fully passed
+
+
+class SiteForecast:
+    """Hourly forecast of one point as parallel typed arrays, sorted by hour."""
+
+    __slots__ = ("epochs", "columns", "updated_epoch", "changed_hours", "tz_id", "_signature")
+
+    def __init__(self):
+        self.epochs = array("q")  # time_epoch of each hour
+        self.columns = {field: array("d") for field in HOURLY_FIELDS}  # NaN where the payload had no value
+        self.updated_epoch = 0  # When the forecast last changed
+        self.changed_hours = 0  # Hours written by the last merge
+        self.tz_id = None  # IANA zone of the site, from the payload's location
+        self._signature = None  # payload_signature of the payload last merged, so it isn't parsed twice
+
+    def merge(self, hours, now):
+        """Write the given (epoch, values) hours, touching only those that changed; returns how many did."""
+        changed = 0
+        for epoch, values in hours:
+            position = bisect_left(self.epochs, epoch)
+            if position < len(self.epochs) and self.epochs[position] == epoch:
+                hour_changed = False
+                for field, value in zip(HOURLY_FIELDS, values):
+                    column = self.columns[field]
+                    old = column[position]
+                    if old != value and not (old != old and value != value):  # NaN == NaN counts as unchanged
+                        column[position] = value
+                        hour_changed = True
+                changed += hour_changed
+            else:
+                self.epochs.insert(position, epoch)
+                for field, value in zip(HOURLY_FIELDS, values):
+                    self.columns[field].insert(position, value)
+                changed += 1
+
+        expired = bisect_left(self.epochs, now - KEEP_PAST_HOURS * 3600)
+        if expired:
+            del self.epochs[:expired]
+            for column in self.columns.values():
+                del column[:expired]
+        if changed:
+            self.updated_epoch = int(now)
+        self.changed_hours = changed
+        return changed
+
+    def window(self, start, hours):
+        """Return (first, last) positions of the hours in [start, start + hours h)."""
+        return bisect_left(self.epochs, start - 3600 + 1), bisect_left(self.epochs, start + hours * 3600)
+
+
+def _value(hour, field):
+    value = hour.get(field)
+    return float(value) if isinstance(value, (int, float)) else float("nan")
+
+
+def parse_hours(payload):
+    """Yield (time_epoch, values) for every hour in a forecast payload, in HOURLY_FIELDS order."""
+    for day in payload.get("forecast", {}).get("forecastday", []):
+        for hour in day.get("hour", []):
+            if "time_epoch" in hour:
+                yield hour["time_epoch"], tuple(_value(hour, field) for field in HOURLY_FIELDS)
+
+
+def payload_signature(payload):
+    """Identify a forecast payload by content: (current.last_updated_epoch, first hour's time_epoch, days).
+
+    Returns None when the payload lacks them, so it is always merged.
+    """
+    updated = payload.get("current", {}).get("last_updated_epoch")
+    days = payload.get("forecast", {}).get("forecastday", [])
+    hours = days[0].get("hour", []) if days else []
+    if updated is None or not hours or "time_epoch" not in hours[0]:
+        return None
+    return updated, hours[0]["time_epoch"], len(days)
+
+
+_sites = OrderedDict()  # (rounded lat, rounded lng) -> SiteForecast, least recently used first
+_lock = threading.Lock()
+
+
+def site_key(lat, lng):
+    """Key forecasts like weather_cache does, so nearby requests share one forecast."""
+    return round(float(lat), weather_cache.COORD_PRECISION), round(float(lng), weather_cache.COORD_PRECISION)
+
+
+def ingest(lat, lng, payload, now=None):
+    """Merge the hourly part of a forecast payload into the site's stored forecast; returns hours changed."""
+    now = now or time.time()
+    key = site_key(lat, lng)
+    # Sized like weather_cache, which holds the payloads these are parsed from; worked out before taking the lock
+    limit = weather_cache.entry_limit(len(_sites))
+    with _lock:
+        site = _sites.get(key)
+        if site is None:
+            site = _sites[key] = SiteForecast()
+        _sites.move_to_end(key)
+        while limit is not None and len(_sites) > limit:
+            _sites.popitem(last=False)
+        signature = payload_signature(payload)
+        if signature is not None and site._signature == signature:
+            return 0  # weather_cache handed back (or upstream re-sent) the forecast we already merged
+        site._signature = signature
+        site.tz_id = payload.get("location", {}).get("tz_id") or site.tz_id
+        return site.merge(parse_hours(payload), now)
+
+
+def forecast_params(api_key, days=FORECAST_DAYS):
+    """Query params of a forecast.json call."""
+    return {"key": api_key, "days": days, "aqi": "no", "alerts": "no"}
+
+
+def fetch_forecast(lat, lng, api_key, days=FORECAST_DAYS):
+    """Fetch the forecast payload for a point (cached until weatherapi can have newer data) and ingest its hours."""
+    payload = weather_cache.get_json(FORECAST_URL, lat, lng, forecast_params(api_key, days))
+    ingest(lat, lng, payload)
+    return payload
+
+
+async def fetch_forecast_async(lat, lng, api_key, days=FORECAST_DAYS):
+    """Async fetch_forecast."""
+    payload = await weather_cache.get_json_async(FORECAST_URL, lat, lng, forecast_params(api_key, days))
+    ingest(lat, lng, payload)
+    return payload
+
+
+def get_site_forecast(lat, lng):
+    """Return the stored SiteForecast for a point, or None if it was never fetched."""
+    key = site_key(lat, lng)
+    with _lock:
+        site = _sites.get(key)
+        if site is not None:
+            _sites.move_to_end(key)
+        return site
+
+
+def outlook(lat, lng, hours=OUTLOOK_HOURS, region="default", now=None):
+    """Classify the stored hourly forecast for the next `hours` hours.
+
+    Returns None without a stored forecast; otherwise a dict with the hour of the most severe typhoon
+    level (earliest on ties, or the wettest hour when no level is reached), its precipitation and
+    wind, the lead time in hours, and the matching rain and typhoon messages.
+    """
+    now = now or time.time()
+    site = get_site_forecast(lat, lng)
+    if site is None:
+        return None
+    with _lock:
+        first, last = site.window(now, hours)
+        if first >= last:
+            return None
+        epochs = site.epochs[first:last]
+        precip = site.columns["precip_mm"][first:last]
+        wind = site.columns["wind_kph"][first:last]
+
+    worst, worst_rank = None, None
+    wettest = None
+    for i, (p, w) in enumerate(zip(precip, wind)):
+        rank = _typhoon_rank(p, w, region)
+        if rank is not None and (worst_rank is None or rank < worst_rank):
+            worst, worst_rank = i, rank
+        if p == p and (wettest is None or p > precip[wettest]):
+            wettest = i
+    pick = worst if worst is not None else wettest
+    if pick is None:
+        return None
+    return {
+        "hours": hours,
+        "epoch": epochs[pick],
+        "time": _local_time(epochs[pick], site.tz_id, lng),
+        "lead_hours": max(0, round((epochs[pick] - now) / 3600)),
+        "precip_mm": precip[pick],
+        "wind_kph": wind[pick],
+        "rain_message": thresholds.rain_message(precip[pick]),
+        "typhoon_level": thresholds.typhoon_level(precip[pick], wind[pick], region),
+        "updated_epoch": site.updated_epoch,
+    }
+
+
+def _local_time(epoch, tz_id, lng):
+    """Render an epoch as YYYY-MM-DD HH:MM on the site's clock, not the server's."""
+    import ephemeris  # pytz is only loaded once a forecast is shown
+    moment = datetime.fromtimestamp(epoch, tz=timezone.utc).astimezone(ephemeris.site_timezone(tz_id, float(lng)))
+    return moment.strftime("%Y-%m-%d %H:%M")
+
+
+def _typhoon_rank(precip_mm, wind_kph, region):
+    """Severity rank of an hour (0 = most severe), regional rules before the defaults; None when calm."""
+    if region != "default" and region in thresholds.TYPHOON_TABLES:
+        index = thresholds.TYPHOON_TABLES[region].index(precip_mm, wind_kph)
+        if index >= 0:
+            return index - len(thresholds.TYPHOON_TABLES[region].messages)  # Regional levels rank first
+    index = thresholds.TYPHOON_TABLES["default"].index(precip_mm, wind_kph)
+    return index if index >= 0 else None
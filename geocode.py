@@ -0,0 +1,72 @@
+from urllib.parse import quote_plus
+
+import requests
+
+import config_loader
+import http_client
+from geocode_cache import GeocodeCache
+
+# Persistent geocode cache so saved addresses don't hit OpenCage on every refresh
+geocode_cache = GeocodeCache(
+    path=config_loader.get("geocode_cache_file", "geocode_cache.json"),
+    ttl=config_loader.get("geocode_cache_ttl", 30 * 24 * 3600),  # Successful lookups are kept for 30 days
+    negative_ttl=config_loader.get("geocode_cache_negative_ttl", 24 * 3600),  # Unknown addresses are retried daily
+    max_entries=config_loader.get("geocode_cache_size", 5000),
+)
+
+def get_coordinates(address):
+    """Retrieve latitude and longitude based on a given address using OpenCage API."""
+    try:
+        return lookup_coordinates(address)
+    except http_client.QuotaExceeded:
+        raise  # Not an unknown address: callers report the spent budget
+    except requests.RequestException as e:
+        print(f"Error getting coordinates: {e}")  # Print error if the request fails
+    return None, None, None
+
+
+def lookup_coordinates(address):
+    """get_coordinates that raises request errors (including http_client.QuotaExceeded) instead of printing them."""
+    if not address:
+        return None, None, None
+    hit, cached = geocode_cache.get(address)  # Serve repeated lookups from the cache
+    if hit:
+        return cached if cached is not None else (None, None, None)
+    response = http_client.get(request_url(address))  # Make the API request through the shared pool
+    response.raise_for_status()  # Raise error if request failed
+    return remember_result(address, response.json())
+
+
+async def get_coordinates_async(address):
+    """Async get_coordinates, sharing its cache."""
+    import async_client
+    if not address:
+        return None, None, None
+    hit, cached = geocode_cache.get(address)
+    if hit:
+        return cached if cached is not None else (None, None, None)
+    try:
+        return remember_result(address, await async_client.get_json(request_url(address)))
+    except http_client.QuotaExceeded:
+        raise
+    except requests.RequestException as e:
+        print(f"Error getting coordinates: {e}")
+    return None, None, None
+
+
+def request_url(address):
+    """Create the request URL for OpenCage API."""
+    open_cage_api_key, open_cage_url = config_loader.open_cage_api()  # Read per call so a rotated key applies at once
+    return f"{open_cage_url}?q={quote_plus(address)}&key={open_cage_api_key}"
+
+
+def remember_result(address, data):
+    """Cache and return (formatted address, lat, lng) from an OpenCage response, (None, None, None) if it has none."""
+    if data.get('results'):  # Check if results are found
+        first_result = data['results'][0]
+        result = (first_result.get('formatted', 'Unknown Address'), first_result['geometry']['lat'],
+                  first_result['geometry']['lng'])  # Formatted address, lat, and long
+        geocode_cache.put(address, result)
+        return result
+    geocode_cache.put(address, None)  # Remember addresses OpenCage can't resolve
+    return None, None, None
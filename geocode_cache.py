@@ -0,0 +1,91 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+
+def normalize_address(address):
+    """Normalize an address string into the key used by the geocode cache."""
+    return " ".join(address.split()).upper()  # Collapse whitespace and upper-case, like address.log entries
+
+
+class GeocodeCache:
+    """Disk-backed geocode cache with a TTL, LRU eviction and negative entries."""
+
+    def __init__(self, path="geocode_cache.json", ttl=30 * 24 * 3600, negative_ttl=24 * 3600, max_entries=5000,
+                 save_interval=5):
+        self.path = path
+        self.ttl = ttl  # Seconds a successful lookup stays valid
+        self.negative_ttl = negative_ttl  # Seconds a "not found" answer stays valid
+        self.max_entries = max_entries  # LRU bound on the number of cached addresses
+        self._entries = OrderedDict()  # key -> {"result": [formatted, lat, lng] or None, "ts": epoch}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.save_interval = save_interval  # Minimum seconds between automatic saves
+        self._dirty = False
+        self._last_save = 0.0
+        self._load()
+        atexit.register(self.save)  # Flush anything the save throttle held back
+
+    def _load(self):
+        """Load cached entries from disk, ignoring a missing or corrupt file."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        # Entries are stored least-recently-used first, so insertion order restores the LRU order
+        for key, entry in data.get("entries", []):
+            self._entries[key] = entry
+
+    def get(self, address):
+        """Return (hit, result) for an address; result is None for a cached negative lookup."""
+        key = normalize_address(address)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                metrics.inc("cache_requests_total", cache="geocode", result="miss")
+                return False, None
+            ttl = self.ttl if entry["result"] is not None else self.negative_ttl
+            if time.time() - entry["ts"] > ttl:
+                del self._entries[key]  # Expired, drop it so the caller re-queries the API
+                self._dirty = True
+                metrics.inc("cache_requests_total", cache="geocode", result="stale")
+                return False, None
+            self._entries.move_to_end(key)  # Mark as most recently used
+            metrics.inc("cache_requests_total", cache="geocode", result="hit")
+            return True, tuple(entry["result"]) if entry["result"] is not None else None
+
+    def put(self, address, result):
+        """Store a lookup result (formatted, lat, lng) or None for an address that was not found."""
+        key = normalize_address(address)
+        with self._lock:
+            self._entries[key] = {"result": list(result) if result is not None else None, "ts": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)  # Evict the least recently used address
+            self._dirty = True
+            due = time.time() - self._last_save >= self.save_interval
+        if due:
+            self.save()  # Throttled so bulk lookups don't rewrite the file on every put
+
+    def save(self):
+        """Write the cache to disk atomically if anything changed."""
+        with self._save_lock:  # Serializes writers so an older snapshot never overwrites a newer one
+            with self._lock:
+                if not self._dirty:
+                    return
+                payload = {"entries": list(self._entries.items())}
+                self._dirty = False
+                self._last_save = time.time()
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as file:
+                    json.dump(payload, file)
+                os.replace(tmp_path, self.path)  # Atomic swap so a crash never leaves a half-written cache
+            except OSError as e:
+                print(f"Error saving geocode cache: {e}")
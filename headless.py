@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import forecast
+import metrics
+import quota
+import replay
+from address_book import load_addresses, load_saved_locations
+from fetch_weather import fetch_forecast, fetch_forecast_async, derive_weather
+from rain_stat import get_rain_message, detect_typhoon_level
+from geocode import get_coordinates, get_coordinates_async
+from http_client import QuotaExceeded
+from observation_store import ObservationStore
+from typhoon_alerts import monitor_sites
+
+
+def observe(address, store=None):
+    """Run geocode -> fetch -> derive for one address and return a JSON-serialisable record."""
+    fetched_at = datetime.now().isoformat(timespec="seconds")
+    try:
+        formatted_address, lat, lng = get_coordinates(address)
+    except QuotaExceeded as e:
+        return {"location": address, "fetched_at": fetched_at, "error": str(e), "quota_exceeded": True}
+    if not formatted_address:
+        return {"location": address, "fetched_at": fetched_at, "error": "Location not found"}
+    try:
+        payload = fetch_forecast(lat, lng)
+    except Exception as e:
+        return {"location": formatted_address, "lat": lat, "lng": lng, "fetched_at": fetched_at, "error": str(e)}
+    return build_record(payload, formatted_address, lat, lng, fetched_at, store)
+
+
+async def observe_async(address, store=None):
+    """Async observe: geocode and fetch on the event loop, then the same record as observe."""
+    fetched_at = datetime.now().isoformat(timespec="seconds")
+    try:
+        formatted_address, lat, lng = await get_coordinates_async(address)
+    except QuotaExceeded as e:
+        return {"location": address, "fetched_at": fetched_at, "error": str(e), "quota_exceeded": True}
+    if not formatted_address:
+        return {"location": address, "fetched_at": fetched_at, "error": "Location not found"}
+    try:
+        payload = await fetch_forecast_async(lat, lng)
+    except Exception as e:
+        return {"location": formatted_address, "lat": lat, "lng": lng, "fetched_at": fetched_at, "error": str(e)}
+    return build_record(payload, formatted_address, lat, lng, fetched_at, store)
+
+
+def build_record(payload, formatted_address, lat, lng, fetched_at, store=None):
+    """Derive the observation from a fetched payload, store it and turn it into a record."""
+    try:
+        observation = derive_weather(payload, lat, lng, formatted_address)
+    except Exception as e:
+        return {"location": formatted_address, "lat": lat, "lng": lng, "fetched_at": fetched_at, "error": str(e)}
+    if observation is None:
+        return {"location": formatted_address, "lat": lat, "lng": lng, "fetched_at": fetched_at,
+                "error": "Weather data not available."}
+    if store is not None:
+        store.record(observation)
+    record = observation.to_dict()
+    record["fetched_at"] = fetched_at
+    record["rain_message"] = get_rain_message(observation.precip_mm)
+    record["typhoon_level"] = detect_typhoon_level(observation.precip_mm, observation.wind_kph)
+    record["forecast"] = forecast.outlook(lat, lng)  # Worst of the next hours, from the payload just fetched
+    return record
+
+
+def run_pipeline(addresses, max_workers=8, store=None):
+    """Observe every address concurrently, yielding records as they complete."""
+    addresses = list(addresses)
+    if not addresses:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(addresses))) as executor:
+        futures = [executor.submit(observe, address, store) for address in addresses]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+async def run_pipeline_async(addresses, store=None):
+    """Observe every address as tasks on one event loop, returning the records in completion order.
+
+    Concurrency is bounded by async_client's pool and the upstream quotas rather than by threads.
+    """
+    import async_client
+    try:
+        return [await task for task in asyncio.as_completed([observe_async(address, store)
+                                                             for address in addresses])]
+    finally:
+        await async_client.close()
+
+
+def write_records(records, output):
+    """Write records as JSON lines to an open file, flushing so tailing consumers see them immediately."""
+    for record in records:
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+    output.flush()
+
+
+def run_once(addresses, output, max_workers=8, store=None, use_async=False):
+    """Run one pass of the pipeline over the given addresses (all saved addresses by default)."""
+    addresses = addresses or load_addresses()
+    if use_async:
+        write_records(asyncio.run(run_pipeline_async(addresses, store)), output)
+    else:
+        write_records(run_pipeline(addresses, max_workers, store), output)
+
+
+def run_every(interval, iterations, job, *args):
+    """Call job(*args) every `interval` seconds until interrupted (or for `iterations` passes).
+
+    The interval is stretched when the weatherapi calls a pass actually made would overrun today's budget.
+    """
+    count = 0
+    while iterations is None or count < iterations:
+        started = time.monotonic()
+        calls_before = quota.sent_today()
+        job(*args)
+        metrics.observe("refresh_cycle_seconds", time.monotonic() - started, app="headless", result="ok")
+        count += 1
+        if iterations is not None and count >= iterations:
+            break
+        delay = quota.stretch_interval(f"headless.{job.__name__}", interval, max(1, quota.sent_today() - calls_before))
+        time.sleep(max(0.0, delay - (time.monotonic() - started)))  # Keep a fixed cadence
+
+
+def run_daemon(addresses, output, interval=30, iterations=None, max_workers=8, store=None, use_async=False):
+    """Run the pipeline every `interval` seconds; saved addresses are re-read each pass to pick up edits."""
+    run_every(interval, iterations, run_once, addresses, output, max_workers, store, use_async)
+
+
+def monitor_once(output, radii):
+    """Check every saved site against one alert-feed fetch and write one status record per site."""
+    checked_at = datetime.now().isoformat(timespec="seconds")
+    records = []
+    for status in monitor_sites(load_saved_locations(), radii):
+        record = status.to_dict()
+        record["checked_at"] = checked_at
+        records.append(record)
+    write_records(records, output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the weather pipeline without the Tk front-end.")
+    parser.add_argument("--record", metavar="DIR", help="Save every upstream response under DIR")
+    parser.add_argument("--replay", metavar="DIR", help="Serve responses recorded under DIR instead of the network")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to each replayed response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of replayed responses failing with 503")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port (/metrics)")
+    parser.add_argument("--metrics-file", help="Rewrite a JSON metrics snapshot to this file periodically")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    once_parser = subparsers.add_parser("once", help="Fetch every address once and exit")
+    daemon_parser = subparsers.add_parser("daemon", help="Fetch every address on a schedule")
+    daemon_parser.add_argument("--interval", type=float, default=30, help="Seconds between passes (default: 30)")
+    daemon_parser.add_argument("--iterations", type=int, default=None, help="Stop after this many passes")
+    for sub in (once_parser, daemon_parser):
+        sub.add_argument("addresses", nargs="*", help="Addresses to observe (default: all saved addresses)")
+        sub.add_argument("--output", help="Append JSON lines to this file instead of stdout")
+        sub.add_argument("--workers", type=int, default=8, help="Concurrent fetches (default: 8)")
+        sub.add_argument("--async", dest="use_async", action="store_true",
+                         help="Fetch every address on one asyncio event loop instead of a thread pool (needs aiohttp)")
+        sub.add_argument("--store", help="Also append observations to the columnar store in this directory")
+
+    monitor_parser = subparsers.add_parser("monitor", help="Watch every saved site against a shared alert feed")
+    monitor_parser.add_argument("--radii", type=int, nargs="+", default=[500, 1000, 1500, 2000],
+                                help="Radii in km (default: 500 1000 1500 2000)")
+    monitor_parser.add_argument("--interval", type=float, default=30, help="Seconds between checks (default: 30)")
+    monitor_parser.add_argument("--iterations", type=int, default=None, help="Stop after this many checks")
+    monitor_parser.add_argument("--output", help="Append JSON lines to this file instead of stdout")
+
+    query_parser = subparsers.add_parser("max", help="Largest stored value of a field over the last N hours")
+    query_parser.add_argument("location", help="Location label as stored (the formatted address)")
+    query_parser.add_argument("--field", default="precip_mm", help="Observation field (default: precip_mm)")
+    query_parser.add_argument("--hours", type=float, default=24, help="Look-back window in hours (default: 24)")
+    query_parser.add_argument("--store", default="observations", help="Store directory (default: observations)")
+
+    args = parser.parse_args(argv)
+    if args.record or args.replay:
+        replay.install("record" if args.record else "replay", args.record or args.replay,
+                       latency=args.latency, error_rate=args.error_rate)
+    metrics.start_exporters(args.metrics_port, args.metrics_file)
+    if args.command == "max":
+        now = time.time()
+        print(ObservationStore(args.store).max(args.location, args.field, int(now - args.hours * 3600), int(now) + 1))
+        return
+
+    if args.command in ("daemon", "monitor"):
+        quota.set_default_priority(quota.BACKGROUND)  # Unattended polling yields to anyone using the GUI
+    output = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    store = ObservationStore(args.store) if getattr(args, "store", None) else None
+    try:
+        if args.command == "monitor":
+            run_every(args.interval, args.iterations, monitor_once, output, args.radii)
+        elif args.command == "once":
+            run_once(args.addresses, output, args.workers, store, args.use_async)
+        else:
+            run_daemon(args.addresses, output, args.interval, args.iterations, args.workers, store, args.use_async)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.metrics_file:
+            metrics.write_snapshot(args.metrics_file)  # Final numbers for short runs
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+import quota
+
+# Connect/read timeouts (in seconds) per upstream host
+HOST_TIMEOUTS = {
+    "api.weatherapi.com": (3.05, 10),
+    "api.opencagedata.com": (3.05, 5),
+}
+DEFAULT_TIMEOUT = (3.05, 10)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}  # Throttled or upstream errors worth retrying
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5  # Seconds, doubled on every attempt
+BACKOFF_CAP = 8.0
+POOL_SIZE = 10  # Keep-alive connections kept open per host
+MAX_CONCURRENT_REQUESTS = 8  # Cap on requests in flight across all threads
+COALESCE_WINDOW = 2.0  # Seconds an identical GET reuses the last successful response instead of a new call
+
+_session = None
+_session_lock = threading.Lock()
+_request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+_recent = {}  # (url, params) -> (response, expiry monotonic time)
+_recent_lock = threading.Lock()
+_governed = True  # False while a replay transport answers from recordings, which spend no upstream quota
+_transport = None  # Replay/record adapter mounted on the shared session, if any
+
+
+class QuotaExceeded(requests.RequestException):
+    """Today's request budget for the host is spent at this priority."""
+
+
+def get_session():
+    """Return the shared keep-alive session, creating it on first use."""
+    global _session, _governed, _transport
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = None
+            if os.environ.get("WEATHER_REPLAY_MODE"):
+                import replay  # Recorded-response transport for offline runs and load tests
+                adapter = replay.adapter_from_env()
+            _governed = getattr(adapter, "mode", None) != "replay"
+            _transport = adapter
+            adapter = adapter or HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def mount_transport(adapter):
+    """Send every request of the shared session through `adapter` (e.g. a replay.ReplayAdapter)."""
+    global _governed, _transport
+    session = get_session()
+    _governed = getattr(adapter, "mode", None) != "replay"
+    _transport = adapter
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def has_transport():
+    """True when a transport adapter (recording or replaying) is mounted, so requests must go through the session."""
+    get_session()
+    return _transport is not None
+
+
+def timeout_for(url):
+    """Return the (connect, read) timeout configured for the host of a URL."""
+    return HOST_TIMEOUTS.get(urlsplit(url).hostname, DEFAULT_TIMEOUT)
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Return how long to sleep before a retry, using full jitter unless the server asked for a delay."""
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), BACKOFF_CAP)
+        except ValueError:
+            pass  # Retry-After can also be an HTTP date; fall back to our own backoff
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _coalesce_key(url, params):
+    return url, tuple(sorted((k, str(v)) for k, v in (params or {}).items()))
+
+
+def recent_response(url, params=None):
+    """Return the successful response to an identical GET sent less than COALESCE_WINDOW ago, or None."""
+    key = _coalesce_key(url, params)
+    with _recent_lock:
+        entry = _recent.get(key)
+        if entry is not None and time.monotonic() < entry[1]:
+            return entry[0]
+    return None
+
+
+def _remember(url, params, response):
+    now = time.monotonic()
+    with _recent_lock:
+        for key in [key for key, (_, expiry) in _recent.items() if expiry <= now]:
+            del _recent[key]
+        _recent[_coalesce_key(url, params)] = (response, now + COALESCE_WINDOW)
+
+
+def clear_recent():
+    """Forget the responses kept for coalescing."""
+    with _recent_lock:
+        _recent.clear()
+
+
+def get(url, params=None, timeout=None):
+    """Send a GET through the shared pool, retrying 429/5xx and connection errors with jittered backoff.
+
+    Every attempt waits for the host's quota (user requests ahead of background polling); a GET
+    identical to one answered in the last COALESCE_WINDOW seconds gets that response without a call.
+    """
+    host = urlsplit(url).hostname
+    response = recent_response(url, params)
+    if response is not None:
+        metrics.inc("http_coalesced_total", host=host)
+        return response
+    session = get_session()
+    timeout = timeout or timeout_for(url)
+    attempt = 0
+    while True:
+        if _governed and not quota.acquire(host):
+            raise QuotaExceeded(f"Daily request budget for {host} is spent")
+        try:
+            with _request_slots:  # Bound the number of concurrent requests
+                started = time.perf_counter()
+                try:
+                    response = session.get(url, params=params, timeout=timeout)
+                finally:
+                    metrics.observe("http_request_seconds", time.perf_counter() - started, host=host)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            metrics.inc("http_requests_total", host=host, status=type(e).__name__)
+            if attempt >= MAX_RETRIES:
+                raise
+            metrics.inc("http_retries_total", host=host)
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+            continue
+
+        metrics.inc("http_requests_total", host=host, status=response.status_code)
+        if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+            metrics.inc("http_retries_total", host=host)
+            delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+            if not (response.status_code == 429 and _governed and quota.penalize(host, delay)):
+                time.sleep(delay)  # A 429 on a governed host instead holds back every caller of the host
+            attempt += 1
+            continue
+        if response.status_code == 200:
+            _remember(url, params, response)
+        return response
+
+
+def get_json(url, params=None, timeout=None):
+    """GET a URL and return the decoded JSON body, raising for HTTP errors."""
+    response = get(url, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
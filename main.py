@@ -1,136 +1,77 @@
-import json
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-import requests
 import time
 import subprocess
 from datetime import datetime
 import webbrowser
 from urllib.parse import quote_plus
-from fetch_weather import get_weather
-
-# Load configuration from config.json
-try:
-    with open("config.json", "r") as file:
-        config_data = json.load(file)  # Parse the JSON configuration file
-except (FileNotFoundError, json.JSONDecodeError):
-    config_data = {}  # If file doesn't exist or there's an error, use empty dictionary
-
-# Extract data from configuration
-address = config_data.get("address")  # Default address if available
-open_cage_api_key = config_data.get("open_cage_api_key", "")  # OpenCage API key for geolocation
-open_cage_url = config_data.get("open_cage_url", "")  # OpenCage URL for geolocation API
-weather_api_key = config_data.get("api_key", "")  # Weather API key for weather information
-weather_url = config_data.get("url", "")  # Weather API URL
-
-def get_coordinates(address):
-    """Retrieve latitude and longitude based on a given address using OpenCage API."""
-    if not address:
-        return None, None, None
-    try:
-        # Create the request URL for OpenCage API
-        request_url = f"{open_cage_url}?q={quote_plus(address)}&key={open_cage_api_key}"
-        response = requests.get(request_url, timeout=5)  # Make the API request
-        response.raise_for_status()  # Raise error if request failed
-        data = response.json()  # Parse the JSON response
-        if data.get('results'):  # Check if results are found
-            first_result = data['results'][0]
-            return first_result.get('formatted', 'Unknown Address'), first_result['geometry']['lat'], \
-            first_result['geometry']['lng']  # Return formatted address, lat, and long
-    except requests.RequestException as e:
-        print(f"Error getting coordinates: {e}")  # Print error if the request fails
-    return None, None, None
-
-def load_addresses():
-    """Load all saved addresses from the address.log file."""
-    try:
-        with open("address.log", "r", encoding="utf-8-sig") as file:
-            return list(set(line.strip().upper() for line in file if line.strip()))  # Read and clean address
-    except UnicodeDecodeError:
-        # If there's an error reading with utf-8, try another encoding
-        with open("address.log", "r", encoding="ISO-8859-1") as file:
-            return list(set(line.strip().upper() for line in file if line.strip()))
-
-def load_temp_address():
-    """Load the most recent temporary address from temp.log."""
-    try:
-        with open("temp.log", "r", encoding="utf-8") as file:
-            return file.readline().strip()  # Read the address from the first line of temp.log
-    except FileNotFoundError:
-        return ""  # Return an empty string if temp.log is not found
-
-def save_address(address):
-    """Save a new address to address.log after validating it."""
-    cleaned_address = address.strip().upper()  # Clean and convert address to uppercase
-
-    if not cleaned_address:
-        print("Address is empty or invalid.")  # If address is empty, don't save it
-        return
-
-    # Convert the address to coordinates and get the formatted address
-    formatted_address, lat, lng = get_coordinates(cleaned_address)
-
-    if not formatted_address or not lat or not lng:
-        print("Invalid location. Coordinates not found.")  # If coordinates are invalid, don't save the address
-        return
-
-    formatted_address_upper = formatted_address.upper()  # Ensure it's in uppercase for consistency
-
-    # Load existing addresses from address.log
-    addresses = load_addresses()
-
-    # Check if the address already exists
-    if formatted_address_upper in addresses:
-        print("Address already exists. Duplicate addresses are not allowed.")  # Prevent duplicate addresses
-        return
-
-    # Insert the new address at the top of the list
-    addresses.insert(0, formatted_address_upper)
-
-    try:
-        # Save the list of addresses back to address.log
-        with open("address.log", "w", encoding="utf-8") as file:
-            file.write("\n".join(addresses) + "\n")
-        print(f"Address '{formatted_address_upper}' saved.")  # Confirm the save
-
-        # Update the combobox to reflect the new address
-        update_combobox()
-
-        # Save the formatted address to temp.log
-        save_temp_address(formatted_address_upper)
-
-    except Exception as e:
-        print(f"Error saving address: {e}")  # Print any error that occurs while saving
-
-def save_temp_address(address):
-    """Save the temporary address to temp.log."""
-    with open("temp.log", "w", encoding="utf-8") as file:
-        file.write(address + "\n")
+from address_book import load_addresses, load_temp_address, save_address, save_temp_address, delete_address, \
+    load_saved_locations
+from background import BackgroundWorker
+import metrics
+import config_loader
+import quota
+
+# fetch_weather, geocode and the observation store (requests, numpy, ...) are imported on the worker
+# thread once the window is up; see preload_pipeline
+
+# Local time-series store so every fetched observation is kept, not just displayed
+observation_store = None
+
+
+def get_observation_store():
+    """Open the observation store on first use (it pulls in numpy)."""
+    global observation_store
+    if observation_store is None:
+        from observation_store import ObservationStore
+        observation_store = ObservationStore(config_loader.get("observation_store", "observations"))
+    return observation_store
+
+
+def preload_pipeline():
+    """Import the weather pipeline in the background so the first refresh doesn't pay for it."""
+    import fetch_weather, geocode
+    get_observation_store()
 
 def update_combobox():
     """Update the combobox values with the latest list of addresses."""
     combobox["values"] = load_addresses()
 
-def delete_address(address):
-    """Delete the selected address from address.log."""
-    addresses = load_addresses()  # Load the current addresses
-    if address in addresses:
-        addresses.remove(address)  # Remove the selected address
-        try:
-            # Save the updated list of addresses back to address.log
-            with open("address.log", "w", encoding="utf-8") as file:
-                file.write("\n".join(addresses) + "\n")
-            print(f"Address '{address}' deleted.")  # Confirm the deletion
-            update_combobox()  # Update the combobox after deletion
-        except Exception as e:
-            print(f"Error deleting address: {e}")  # Print any errors that occur while deleting
-    else:
-        print(f"Address '{address}' not found.")  # Print if the address wasn't found
-
-def update_textbox():
-    """Update the text output with the selected address' coordinates and weather information."""
-    selected_address = combobox.get().strip()  # Get the address from the combobox
-    formatted_address, lat, lng = get_coordinates(selected_address)  # Get coordinates of the address
+def delete_selected_address():
+    """Delete the address shown in the combobox and refresh the list."""
+    if delete_address(combobox.get().strip()):
+        update_combobox()  # Update the combobox after deletion
+
+def fetch_location_weather(selected_address, priority=quota.USER):
+    """Geocode an address and fetch its weather; runs on a worker thread."""
+    from geocode import get_coordinates
+    from fetch_weather import get_weather
+    with quota.priority(priority):  # Periodic refreshes queue behind anything the user asked for
+        formatted_address, lat, lng = get_coordinates(selected_address)  # Get coordinates of the address
+        weather_data = None
+        if formatted_address:
+            weather_data = get_weather(lat, lng, formatted_address, get_observation_store())  # Fetch and record weather data
+            save_temp_address(formatted_address)  # Save the address to temp.log for future use
+    return formatted_address, lat, lng, weather_data
+
+def update_textbox(priority=quota.USER):
+    """Start a background refresh of the selected address' coordinates and weather information."""
+    global refresh_in_flight
+    global refresh_started
+    if refresh_in_flight:
+        metrics.inc("refresh_skipped_total", app="main")
+        return  # Previous refresh is still waiting on the network; don't pile up requests
+    refresh_in_flight = True
+    refresh_started = time.perf_counter()
+    selected_address = combobox.get().strip()  # Read the widget on the UI thread
+    worker.submit(fetch_location_weather, selected_address, priority, callback=render_weather, error_callback=render_error)
+
+def render_weather(result):
+    """Render a finished refresh into the text output; runs on the Tk thread."""
+    global refresh_in_flight
+    refresh_in_flight = False
+    render_started = time.perf_counter()
+    formatted_address, lat, lng, weather_data = result
     text_output.config(state=tk.NORMAL)  # Enable editing of the text widget
     text_output.delete(1.0, tk.END)  # Clear the current content
 
@@ -140,17 +81,56 @@ def update_textbox():
         add_hyperlink(formatted_address)  # Add a hyperlink to Google Maps
 
         text_output.insert(tk.END, "\nWEATHER:\n\n")  # Show weather data
-        weather_data = get_weather(lat, lng)  # Fetch weather data for the coordinates
         if weather_data:
             text_output.insert(tk.END, weather_data)  # Insert weather data
         else:
             text_output.insert(tk.END, "\nError fetching weather data.\n")  # If there's an error, show message
-
-        save_temp_address(formatted_address)  # Save the address to temp.log for future use
     else:
         text_output.insert(tk.END, "\nLocation not found!\n")  # If no valid address, show error message
 
     text_output.config(state=tk.DISABLED)  # Disable editing again
+    finished = time.perf_counter()
+    metrics.observe("render_seconds", finished - render_started, app="main")
+    metrics.observe("refresh_cycle_seconds", finished - refresh_started, app="main", result="ok")
+
+def render_error(error):
+    """Show a failed background refresh in the text output."""
+    from http_client import QuotaExceeded  # Already loaded by the worker that raised the error
+    global refresh_in_flight
+    refresh_in_flight = False
+    text_output.config(state=tk.NORMAL)
+    text_output.delete(1.0, tk.END)
+    if isinstance(error, QuotaExceeded):
+        text_output.insert(tk.END, f"\nRequest budget spent: {error}. Try again after 00:00 UTC.\n")
+    else:
+        text_output.insert(tk.END, f"\nError fetching weather data: {error}\n")
+    text_output.config(state=tk.DISABLED)
+    metrics.observe("refresh_cycle_seconds", time.perf_counter() - refresh_started, app="main", result="error")
+
+def fetch_all_locations():
+    """Fetch every saved location off the Tk thread, posting each site to the UI as it completes."""
+    from fetch_weather import get_weather_many
+    for formatted_address, weather_data in get_weather_many(load_saved_locations(), store=get_observation_store()):
+        worker.post(append_location, formatted_address, weather_data)
+
+def append_location(formatted_address, weather_data):
+    """Append one site's weather to the text output; runs on the Tk thread."""
+    text_output.config(state=tk.NORMAL)
+    text_output.insert(tk.END, f"{formatted_address}\n\n{weather_data}\n{'-' * 60}\n\n")
+    text_output.config(state=tk.DISABLED)
+
+def show_all_locations():
+    """Fetch all saved locations concurrently and show each one as soon as its weather arrives."""
+    text_output.config(state=tk.NORMAL)
+    text_output.delete(1.0, tk.END)
+    text_output.config(state=tk.DISABLED)
+    worker.submit(fetch_all_locations, error_callback=render_all_error)
+
+def render_all_error(error):
+    """Note a failed all-locations fetch below the sites already shown; the selected-address refresh is untouched."""
+    text_output.config(state=tk.NORMAL)
+    text_output.insert(tk.END, f"\nError fetching weather data: {error}\n")
+    text_output.config(state=tk.DISABLED)
 
 def add_hyperlink(text):
     """Add a hyperlink to the address, making it clickable."""
@@ -169,11 +149,12 @@ def open_link(url):
     """Open the hyperlink in a web browser."""
     webbrowser.open(f"https://www.google.com/maps?q={url}&t=k")
 
-def fetch_weather_periodically():
+def fetch_weather_periodically(background=False):
     """Fetch weather data periodically while the app is running."""
     if running:
-        root.after(30000, fetch_weather_periodically)  # Re-run every 30 seconds
-        root.after(0, update_textbox)  # Update the text box immediately
+        interval = quota.stretch_interval("main", 30)  # Every 30 seconds, or slower when the daily budget runs low
+        root.after(int(interval * 1000), fetch_weather_periodically, True)
+        root.after(0, update_textbox, quota.BACKGROUND if background else quota.USER)  # Update the text box immediately
 
 def toggle_run():
     """Toggle the state of the app between running and stopped."""
@@ -185,7 +166,7 @@ def toggle_run():
     selected_address = combobox.get().strip()  # Get the selected address
 
     if running:
-        save_address(selected_address)  # Save the address when the app starts
+        worker.submit(save_address, selected_address, callback=on_address_saved)  # Save the address off the Tk thread
         fetch_weather_periodically()  # Start periodic weather updates
 
 def update_time():
@@ -205,54 +186,83 @@ def on_combobox_change(event):
     selected_address = combobox.get().strip()
     if selected_address:
         print(f"New Address Selected: {selected_address}")  # Debugging message
-        save_address(selected_address)  # Save the address
-        update_combobox()  # Update combobox with new list of addresses
+        worker.submit(save_address, selected_address, callback=on_address_saved)  # Save the address off the Tk thread
 
-# Create main application window
-root = tk.Tk()
-root.title("Weather Info")
-root.geometry("600x850")  # Set window size
-root.configure(bg="#f4f4f9")  # Set a light background color for the main window
+def on_address_saved(saved_address):
+    """Refresh the combobox once a background save has finished."""
+    if saved_address:
+        update_combobox()  # Update combobox with new list of addresses
 
 running = False  # App is not running by default
-addresses = load_addresses()  # Load saved addresses
-default_location = load_temp_address() or config_data.get("address")  # Load the default location
+refresh_in_flight = False  # True while a background weather refresh is running
+refresh_started = 0.0  # perf_counter() when the current refresh was submitted
+worker = BackgroundWorker(name="main")  # Runs network calls off the Tk thread
+
+def create_gui():
+    """Build the Tk front-end and run its main loop; the weather pipeline itself lives in headless.py."""
+    global root, combobox, text_output, run_button, time_label
+
+    # Optional /metrics endpoint and JSON dump (config.json metrics_port / metrics_file, or WEATHER_METRICS_*)
+    metrics.start_exporters(config_loader.get("metrics_port"), config_loader.get("metrics_file"))
+
+    # Create main application window
+    root = tk.Tk()
+    root.title("Weather Info")
+    root.geometry("600x850")  # Set window size
+    root.configure(bg="#f4f4f9")  # Set a light background color for the main window
+
+    addresses = load_addresses()  # Load saved addresses
+    default_location = load_temp_address() or config_loader.get("address")  # Load the default location
+
+    # Combobox to select addresses
+    combobox = ttk.Combobox(root, values=addresses, state="normal", width=80)
+    combobox.set(default_location)  # Set the default location in the combobox
+    combobox.grid(row=0, column=0, columnspan=2, padx=20, pady=10)
+
+    # Textbox to display coordinates and weather info
+    text_output = scrolledtext.ScrolledText(root, wrap=tk.WORD, width=68, height=40, state=tk.DISABLED, font=("Arial", 11), bg="#f9f9f9", fg="#333333", bd=2)
+    text_output.grid(row=1, column=0, columnspan=2, padx=20, pady=10)
+
+
+    # Footer frame containing control buttons
+    footer_frame = tk.Frame(root, bg="#f4f4f9")
+    footer_frame.grid(row=2, column=0, columnspan=2, pady=(0, 20), sticky="ew")
+
+    # Button to toggle app run state
+    run_button = tk.Button(footer_frame, text="Run", command=toggle_run, bg="#3498db", fg="white", font=("Arial", 10), relief="raised", bd=2)
+    run_button.grid(row=0, column=0, padx=10, pady=10, sticky="w")
 
-# Combobox to select addresses
-combobox = ttk.Combobox(root, values=addresses, state="normal", width=80)
-combobox.set(default_location)  # Set the default location in the combobox
-combobox.grid(row=0, column=0, columnspan=2, padx=20, pady=10)
+    # Button to run typhoon detection script
+    btn = tk.Button(footer_frame, text="Run Detect Typhoon", command=run_detect_typhoon, bg="#a2c4c9", fg="black", font=("Arial", 10), relief="raised", bd=2)
+    btn.grid(row=0, column=2, padx=10, pady=10, sticky="e")
 
-# Textbox to display coordinates and weather info
-text_output = scrolledtext.ScrolledText(root, wrap=tk.WORD, width=68, height=40, state=tk.DISABLED, font=("Arial", 11), bg="#f9f9f9", fg="#333333", bd=2)
-text_output.grid(row=1, column=0, columnspan=2, padx=20, pady=10)
+    # Label to display current time
+    time_label = tk.Label(footer_frame, font=("Arial", 10), bg="#f4f4f9", fg="#555555")
+    time_label.grid(row=0, column=1, padx=10, pady=20, sticky="e")
 
+    # Button to delete the selected address
+    delete_button = tk.Button(footer_frame, text="Delete Address", command=delete_selected_address, bg="#e74c3c", fg="white", font=("Arial", 10), relief="raised", bd=2)
+    delete_button.grid(row=0, column=3, padx=10, pady=10, sticky="e")
 
-# Footer frame containing control buttons
-footer_frame = tk.Frame(root, bg="#f4f4f9")
-footer_frame.grid(row=2, column=0, columnspan=2, pady=(0, 20), sticky="ew")
+    # Button to show weather for every saved address at once
+    all_button = tk.Button(footer_frame, text="All Locations", command=show_all_locations, bg="#95a5a6", fg="white", font=("Arial", 10), relief="raised", bd=2)
+    all_button.grid(row=0, column=4, padx=10, pady=10, sticky="e")
 
-# Button to toggle app run state
-run_button = tk.Button(footer_frame, text="Run", command=toggle_run, bg="#3498db", fg="white", font=("Arial", 10), relief="raised", bd=2)
-run_button.grid(row=0, column=0, padx=10, pady=10, sticky="w")
 
-# Button to run typhoon detection script
-btn = tk.Button(footer_frame, text="Run Detect Typhoon", command=run_detect_typhoon, bg="#a2c4c9", fg="black", font=("Arial", 10), relief="raised", bd=2)
-btn.grid(row=0, column=2, padx=10, pady=10, sticky="e")
+    # Start time update loop
+    update_time()
 
-# Label to display current time
-time_label = tk.Label(footer_frame, font=("Arial", 10), bg="#f4f4f9", fg="#555555")
-time_label.grid(row=0, column=1, padx=10, pady=20, sticky="e")
+    # Hand finished background fetches to the UI
+    worker.poll(root)
 
-# Button to delete the selected address
-delete_button = tk.Button(footer_frame, text="Delete Address", command=lambda: delete_address(combobox.get().strip()), bg="#e74c3c", fg="white", font=("Arial", 10), relief="raised", bd=2)
-delete_button.grid(row=0, column=3, padx=10, pady=10, sticky="e")
+    # Warm up the heavy imports only after the window has been drawn
+    root.after_idle(worker.submit, preload_pipeline)
 
+    # Bind combobox selection change event
+    combobox.bind("<<ComboboxSelected>>", on_combobox_change)
 
-# Start time update loop
-update_time()
+    root.mainloop()  # Start the main application loop
 
-# Bind combobox selection change event
-combobox.bind("<<ComboboxSelected>>", on_combobox_change)
 
-root.mainloop()  # Start the main application loop
+if __name__ == "__main__":
+    create_gui()
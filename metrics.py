@@ -0,0 +1,224 @@
+import json
+import os
+import threading
+import time
+
+# Histogram bucket upper bounds in seconds, from a cached lookup up to a fully retried upstream call
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "http_request_seconds": "Duration of each outbound HTTP attempt",
+    "http_requests_total": "Outbound HTTP attempts by host and status",
+    "http_retries_total": "Outbound HTTP attempts that were retried",
+    "http_coalesced_total": "GETs answered with a response from the last few seconds instead of a new call",
+    "quota_used_today": "Requests sent to a host since the daily budget last reset",
+    "quota_rejected_total": "Requests refused because the daily budget for their priority was spent",
+    "quota_wait_seconds": "Time a request waited for its host's rate limit",
+    "poll_interval_seconds": "Poll interval after stretching it to fit the daily budget",
+    "cache_requests_total": "Cache lookups by cache and result",
+    "refresh_cycle_seconds": "Time from starting a refresh to its result being shown",
+    "refresh_skipped_total": "Refreshes skipped because the previous one was still running",
+    "render_seconds": "Time spent drawing a result in the Tk window",
+    "worker_queue_depth": "Finished jobs waiting for the UI thread",
+    "worker_jobs_in_flight": "Jobs submitted to a background worker and not finished yet",
+    "observation_store_errors_total": "Observations fetched but not stored (disk full, permissions, ...)",
+}
+
+_lock = threading.Lock()
+_counters = {}  # (name, labels) -> value
+_gauges = {}  # (name, labels) -> value
+_gauge_callbacks = {}  # (name, labels) -> function returning the current value
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count], sum
+_exporters_started = False
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    """Add to a counter."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def set_gauge(name, value, **labels):
+    """Set a gauge to a value."""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def add_gauge(name, amount, **labels):
+    """Move a gauge up or down."""
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = _gauges.get(key, 0) + amount
+
+
+def gauge_callback(name, func, **labels):
+    """Read a gauge from func() whenever metrics are exported (e.g. a queue size)."""
+    with _lock:
+        _gauge_callbacks[_key(name, labels)] = func
+
+
+def observe(name, seconds, **labels):
+    """Record one duration in a histogram."""
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0]
+        counts = histogram[0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        histogram[1] += seconds
+
+
+def _collect():
+    """Return counters, gauges (callbacks evaluated) and histograms as consistent copies."""
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        callbacks = dict(_gauge_callbacks)
+        histograms = {key: (list(counts), total) for key, (counts, total) in _histograms.items()}
+    for key, func in callbacks.items():
+        try:
+            gauges[key] = func()
+        except Exception:
+            continue  # A widget or worker that went away just drops out of the export
+    return counters, gauges, histograms
+
+
+def snapshot():
+    """Return every metric as a JSON-serialisable dict."""
+    counters, gauges, histograms = _collect()
+
+    def series(items, render):
+        out = {}
+        for (name, labels), value in sorted(items.items()):
+            out.setdefault(name, []).append({"labels": dict(labels), **render(value)})
+        return out
+
+    def histogram_fields(value):
+        counts, total = value
+        count = sum(counts)
+        return {"count": count, "sum": round(total, 6), "mean": round(total / count, 6) if count else None,
+                "buckets": dict(zip([str(bound) for bound in BUCKETS] + ["+Inf"], counts))}
+
+    return {
+        "timestamp": time.time(),
+        "counters": series(counters, lambda value: {"value": value}),
+        "gauges": series(gauges, lambda value: {"value": value}),
+        "histograms": series(histograms, histogram_fields),
+    }
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus():
+    """Return every metric in the Prometheus text exposition format."""
+    counters, gauges, histograms = _collect()
+    lines = []
+    seen = set()
+
+    def header(name, kind):
+        if name not in seen:
+            seen.add(name)
+            if name in HELP:
+                lines.append(f"# HELP {name} {HELP[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        header(name, "counter")
+        lines.append(f"{name}{_label_text(labels)} {value}")
+    for (name, labels), value in sorted(gauges.items()):
+        header(name, "gauge")
+        lines.append(f"{name}{_label_text(labels)} {value}")
+    for (name, labels), (counts, total) in sorted(histograms.items()):
+        header(name, "histogram")
+        cumulative = 0
+        for bound, count in zip(list(BUCKETS) + ["+Inf"], counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_label_text(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_sum{_label_text(labels)} {total}")
+        lines.append(f"{name}_count{_label_text(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def serve(port, host="127.0.0.1"):
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread; returns the server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Only paid for when exporting
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] == "/metrics.json":
+                body, content_type = json.dumps(snapshot()).encode("utf-8"), "application/json"
+            else:
+                body, content_type = render_prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes every few seconds would flood the console
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def write_snapshot(path):
+    """Write the JSON snapshot to path atomically."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(snapshot(), file, indent=1)
+    os.replace(temp_path, path)
+
+
+def dump_periodically(path, interval=60):
+    """Rewrite the JSON snapshot at path every `interval` seconds from a daemon thread."""
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                write_snapshot(path)
+            except OSError as e:
+                print(f"Error writing metrics: {e}")
+
+    threading.Thread(target=run, name="metrics-dump", daemon=True).start()
+
+
+def start_exporters(port=None, dump_path=None, interval=60):
+    """Start the HTTP endpoint and/or JSON dump, falling back to WEATHER_METRICS_PORT / _FILE / _INTERVAL."""
+    global _exporters_started
+    port = port or int(os.environ.get("WEATHER_METRICS_PORT", 0))
+    dump_path = dump_path or os.environ.get("WEATHER_METRICS_FILE")
+    interval = float(os.environ.get("WEATHER_METRICS_INTERVAL", interval))
+    with _lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+    if port:
+        try:
+            serve(port)
+        except OSError as e:
+            print(f"Error starting metrics endpoint on port {port}: {e}")
+    if dump_path:
+        dump_periodically(dump_path, interval)
@@ -0,0 +1,86 @@
+from dataclasses import dataclass, asdict
+
+
+@dataclass(slots=True)
+class WeatherObservation:
+    """Current conditions for one location plus the derived indices; numeric fields are None when missing."""
+    location: str
+    lat: float
+    lng: float
+    observed_epoch: int  # current.last_updated_epoch from weatherapi
+    temp_c: float
+    feels_like_c: float | None
+    humidity: float
+    wind_kph: float
+    wind_dir: str
+    wind_dir_degrees: float | None
+    wind_gust_kph: float | None
+    cloud_cover: float | None
+    precip_mm: float
+    uv_index: float | None
+    visibility_km: float | None
+    pressure_mb: float | None
+    condition: str
+    sunrise: str | None
+    sunset: str | None
+    moon_phase: str | None
+    solar_noon_minutes: float  # Minutes after midnight
+    wind_chill_c: float | None  # None when wind is too light for a wind chill
+    hsi_c: float | None  # Heat index in °C, None when too cool or dry for heat stress
+    hsi_category: int | None  # 0 = none, 1 = low, 2 = moderate, 3 = high, 4 = extreme
+
+    def to_dict(self):
+        """Return the observation as a plain dict (for JSON output)."""
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class StationReport:
+    """Current conditions as shown by the typhoon detector."""
+    location: str
+    lat: float
+    lon: float
+    temperature: float | None
+    wind_speed: float | None
+    humidity: float | None
+    pressure: float | None
+    timezone: str
+    current_time: str
+
+
+@dataclass(slots=True)
+class NearbyAlert:
+    """A weather alert within the search radius of a location."""
+    headline: str
+    description: str
+    distance: float  # Kilometres from the location
+    level: str
+
+
+@dataclass(slots=True)
+class SiteAlertStatus:
+    """Alert proximity and severity for one monitored site."""
+    site: str
+    lat: float
+    lon: float
+    alert_counts: dict  # radius km -> number of alerts within it
+    nearest_radius: int | None  # Smallest radius holding an alert, None when all clear
+    nearest_distance: float | None  # Kilometres to the closest alert
+    level: str | None  # Typhoon level of the closest alert
+    severity: str | None  # Highest weatherapi severity among alerts in range
+    feed_lat: float  # Point whose alert feed this site was checked against
+    feed_lon: float
+
+    def to_dict(self):
+        """Return the status as a plain dict (for JSON output)."""
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class SolarDay:
+    """Sun and moon figures of one site for one day, as shown in the weather text."""
+    date: str  # YYYY-MM-DD
+    solar_noon_minutes: float  # Minutes after midnight
+    sunrise: str  # "05:52 AM" like weatherapi's astro block, or "No sunrise"
+    sunset: str
+    moon_phase: str
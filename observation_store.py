@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+import metrics
+
+# Columns persisted for every observation; observed_epoch is the time key
+TIME_FIELD = "observed_epoch"
+FIELDS = {
+    "temp_c": np.float64,
+    "feels_like_c": np.float64,
+    "humidity": np.float64,
+    "wind_kph": np.float64,
+    "wind_dir_degrees": np.float64,
+    "wind_gust_kph": np.float64,
+    "cloud_cover": np.float64,
+    "precip_mm": np.float64,
+    "uv_index": np.float64,
+    "visibility_km": np.float64,
+    "pressure_mb": np.float64,
+    "wind_chill_c": np.float64,
+    "hsi_c": np.float64,
+    "hsi_category": np.int8,
+}
+
+
+def location_key(location):
+    """Return a filesystem-safe directory name for a location label."""
+    slug = re.sub(r"[^A-Z0-9]+", "_", location.upper()).strip("_")[:48]
+    digest = hashlib.sha1(location.upper().encode("utf-8")).hexdigest()[:8]  # Keeps similar labels apart
+    return f"{slug}-{digest}"
+
+
+def segment_name(epoch):
+    """Return the monthly segment (YYYY-MM, UTC) an epoch belongs to."""
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m")
+
+
+def _read_column(path, dtype):
+    """Memory-map a column file, returning an empty array when it doesn't exist yet."""
+    try:
+        if os.path.getsize(path) == 0:
+            return np.empty(0, dtype=dtype)
+    except FileNotFoundError:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+class ObservationStore:
+    """Append-only columnar store: one raw binary file per field, per location, per monthly segment."""
+
+    def __init__(self, root="observations"):
+        self.root = root
+        self._lock = threading.Lock()
+        self._last_epoch = {}  # location key -> newest stored observed_epoch
+
+    def _location_dir(self, location):
+        return os.path.join(self.root, location_key(location))
+
+    def _newest_epoch(self, location):
+        """Return the newest stored epoch for a location, reading it from disk the first time."""
+        key = location_key(location)
+        if key not in self._last_epoch:
+            newest = None
+            segments = self.segments(location)
+            if segments:
+                segment_dir = os.path.join(self._location_dir(location), segments[-1])
+                times = _read_column(os.path.join(segment_dir, f"{TIME_FIELD}.bin"), np.int64)
+                newest = int(times[-1]) if len(times) else None
+                self._repair(segment_dir, len(times))
+            self._last_epoch[key] = newest
+        return self._last_epoch[key]
+
+    def _repair(self, segment_dir, rows):
+        """Truncate columns left longer than `rows` by an interrupted append."""
+        for field, dtype in list(FIELDS.items()) + [(TIME_FIELD, np.int64)]:
+            path = os.path.join(segment_dir, f"{field}.bin")
+            size = rows * np.dtype(dtype).itemsize
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    def append(self, observation):
+        """Append one WeatherObservation; returns False when it is not newer than the last stored row."""
+        epoch = int(observation.observed_epoch)
+        with self._lock:
+            newest = self._newest_epoch(observation.location)
+            if newest is not None and epoch <= newest:
+                return False  # Same upstream observation served again from cache (or out of order)
+
+            location_dir = self._location_dir(observation.location)
+            segment_dir = os.path.join(location_dir, segment_name(epoch))
+            os.makedirs(segment_dir, exist_ok=True)
+            meta_path = os.path.join(location_dir, "meta.json")
+            if not os.path.exists(meta_path):
+                with open(meta_path, "w", encoding="utf-8") as file:
+                    json.dump({"location": observation.location, "lat": observation.lat, "lng": observation.lng}, file)
+
+            time_path = os.path.join(segment_dir, f"{TIME_FIELD}.bin")
+            rows = os.path.getsize(time_path) // np.dtype(np.int64).itemsize if os.path.exists(time_path) else 0
+            try:
+                for field, dtype in FIELDS.items():
+                    value = getattr(observation, field)
+                    if value is None:
+                        value = -1 if np.issubdtype(dtype, np.integer) else np.nan  # Missing value markers
+                    with open(os.path.join(segment_dir, f"{field}.bin"), "ab") as file:
+                        file.write(np.array([value], dtype=dtype).tobytes())
+                # The time column is written last, so a row only becomes visible once all its fields exist
+                with open(time_path, "ab") as file:
+                    file.write(np.array([epoch], dtype=np.int64).tobytes())
+            except (OSError, ValueError):
+                self._repair(segment_dir, rows)  # Drop the partial row now so later appends stay aligned
+                raise
+
+            self._last_epoch[location_key(observation.location)] = epoch
+            return True
+
+    def record(self, observation):
+        """append() for callers whose result is the report: a storage failure is printed and counted, not raised."""
+        try:
+            return self.append(observation)
+        except (OSError, ValueError) as e:
+            print(f"Error storing observation: {e}")  # The fetched weather is still shown
+            metrics.inc("observation_store_errors_total", error=type(e).__name__)
+            return False
+
+    def segments(self, location):
+        """Return the monthly segments stored for a location, oldest first."""
+        try:
+            return sorted(name for name in os.listdir(self._location_dir(location))
+                          if os.path.isdir(os.path.join(self._location_dir(location), name)))
+        except FileNotFoundError:
+            return []
+
+    def locations(self):
+        """Return the metadata (location, lat, lng) of every stored location."""
+        result = []
+        if not os.path.isdir(self.root):
+            return result
+        for name in sorted(os.listdir(self.root)):
+            try:
+                with open(os.path.join(self.root, name, "meta.json"), "r", encoding="utf-8") as file:
+                    result.append(json.load(file))
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+        return result
+
+    def scan(self, location, start, end, fields=None):
+        """Return {field: array} for a location's rows with start <= observed_epoch < end."""
+        fields = list(fields or FIELDS)
+        start_segment, end_segment = segment_name(start), segment_name(max(start, end - 1))
+        parts = {field: [] for field in [TIME_FIELD] + fields}
+        location_dir = self._location_dir(location)
+
+        for segment in self.segments(location):
+            if segment < start_segment or segment > end_segment:
+                continue  # Whole month is outside the requested range
+            segment_dir = os.path.join(location_dir, segment)
+            times = _read_column(os.path.join(segment_dir, f"{TIME_FIELD}.bin"), np.int64)
+            rows = len(times)  # Rows are only complete up to the length of the time column
+            lo, hi = np.searchsorted(times, [start, end])  # Times are append-only, hence sorted
+            if lo >= hi:
+                continue
+            parts[TIME_FIELD].append(np.asarray(times[lo:hi]))
+            for field in fields:
+                column = _read_column(os.path.join(segment_dir, f"{field}.bin"), FIELDS[field])[:rows]
+                parts[field].append(np.asarray(column[lo:hi]))
+
+        result = {}
+        for field, chunks in parts.items():
+            dtype = np.int64 if field == TIME_FIELD else FIELDS[field]
+            result[field] = np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+        return result
+
+    def max(self, location, field, start, end):
+        """Return the largest value of a field in a time range, or None when there is no data."""
+        values = self.scan(location, start, end, [field])[field]
+        if np.issubdtype(values.dtype, np.floating):
+            values = values[~np.isnan(values)]
+        return values.max().item() if len(values) else None
@@ -0,0 +1,292 @@
+import heapq
+import itertools
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import config_loader
+import metrics
+
+USER = 0  # Someone is waiting on the screen for this result
+BACKGROUND = 1  # Periodic polling; yields to user requests and stops short of the daily budget
+USER_RESERVE = 0.1  # Share of each daily budget only user requests may spend
+
+# Upstream limits per host; override any field with "quotas": {"<host>": {...}} in config.json
+DEFAULT_QUOTAS = {
+    "api.weatherapi.com": {"per_second": 5, "burst": 10, "daily": 30000},  # Free plan: 1M calls a month
+    "api.opencagedata.com": {"per_second": 1, "burst": 1, "daily": 2500},  # Free plan: 1/s, 2,500 a day
+}
+WEATHER_HOST = "api.weatherapi.com"
+USAGE_DB = "quota.db"  # Daily counts shared by every process (GUI, typhoon window, headless runs); "quota_db" in config
+POLLER_TIMEOUT = 300  # A poller that hasn't planned a cycle for this long (beyond its interval) is gone
+
+_local = threading.local()
+_default_priority = USER
+
+
+def current_priority():
+    """Priority of requests sent from this thread."""
+    return getattr(_local, "priority", _default_priority)
+
+
+def set_default_priority(priority):
+    """Priority for threads that never set one (headless runs are all background)."""
+    global _default_priority
+    _default_priority = priority
+
+
+@contextmanager
+def priority(value):
+    """Send the requests made inside this block with the given priority."""
+    previous = getattr(_local, "priority", None)
+    _local.priority = value
+    try:
+        yield
+    finally:
+        if previous is None:
+            del _local.priority
+        else:
+            _local.priority = previous
+
+
+def _utc_day():
+    return datetime.now(timezone.utc).date()
+
+
+_usage_db = None
+_usage_lock = threading.Lock()
+
+
+def _usage():
+    """Return the shared usage database, creating it on first use."""
+    global _usage_db
+    if _usage_db is None:
+        _usage_db = sqlite3.connect(config_loader.get("quota_db", USAGE_DB), timeout=5, isolation_level=None,
+                                    check_same_thread=False)
+        _usage_db.execute("CREATE TABLE IF NOT EXISTS usage ("
+                          "host TEXT, day TEXT, used INTEGER NOT NULL, PRIMARY KEY (host, day))")
+    return _usage_db
+
+
+def _used(host, day):
+    """Requests every process has sent to a host on a UTC day."""
+    with _usage_lock:
+        row = _usage().execute("SELECT used FROM usage WHERE host = ? AND day = ?", (host, day.isoformat())).fetchone()
+    return row[0] if row else 0
+
+
+def _take(host, day, budget):
+    """Count one request against a host's shared daily usage; returns the new count, or None when `budget` is spent."""
+    with _usage_lock:
+        db = _usage()
+        db.execute("BEGIN IMMEDIATE")  # Other processes wait, so two of them can't both take the last request
+        try:
+            row = db.execute("SELECT used FROM usage WHERE host = ? AND day = ?", (host, day.isoformat())).fetchone()
+            used = row[0] if row else 0
+            if used < budget:
+                db.execute("INSERT INTO usage (host, day, used) VALUES (?, ?, 1) "
+                           "ON CONFLICT (host, day) DO UPDATE SET used = used + 1", (host, day.isoformat()))
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+    return used + 1 if used < budget else None
+
+
+def seconds_until_reset():
+    """Seconds left until the daily budgets reset (UTC midnight, as both providers count)."""
+    now = datetime.now(timezone.utc)
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+    return (tomorrow - now).total_seconds()
+
+
+class HostQuota:
+    """Token bucket plus daily budget for one upstream host; waiting callers go by priority, then arrival.
+
+    The rate is per process; the daily count is kept in USAGE_DB, so every process spends one budget.
+    """
+
+    def __init__(self, host, per_second, burst, daily):
+        self.host = host
+        self.rate = float(per_second)
+        self.burst = float(burst)
+        self.daily = int(daily)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0  # Set when upstream answers 429
+        self.day = _utc_day()
+        self.used_today = 0  # By every process, as last read from USAGE_DB
+        self.sent_today = 0  # By this process
+        self._load_used()
+        self._waiters = []  # Heap of (priority, arrival) tickets
+        self._arrivals = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        day = _utc_day()
+        if day != self.day:
+            self.day, self.used_today, self.sent_today = day, 0, 0
+            self._load_used()
+
+    def _load_used(self):
+        try:
+            self.used_today = max(self.used_today, _used(self.host, self.day))
+        except sqlite3.Error as e:
+            print(f"Error reading quota usage: {e}")  # Keep counting this process alone
+
+    def _count(self, priority):
+        """Count one request against today's shared budget; False once the priority's share is spent."""
+        try:
+            used = _take(self.host, self.day, self.budget(priority))
+        except sqlite3.Error as e:
+            print(f"Error updating quota usage: {e}")  # Keep counting this process alone
+            used = self.used_today + 1 if self.used_today < self.budget(priority) else None
+        if used is None:
+            self.used_today = max(self.used_today, self.budget(priority))
+            metrics.inc("quota_rejected_total", host=self.host, priority=priority)
+            return False
+        self.used_today = used
+        self.sent_today += 1
+        self.tokens -= 1
+        metrics.set_gauge("quota_used_today", self.used_today, host=self.host)
+        return True
+
+    def budget(self, priority):
+        """Requests a priority may send per day."""
+        return self.daily if priority == USER else int(self.daily * (1 - USER_RESERVE))
+
+    def remaining(self, priority=BACKGROUND):
+        """Requests still allowed today at a priority."""
+        with self._cond:
+            self._refill(time.monotonic())
+            self._load_used()  # Other processes may have spent some since
+            return max(0, self.budget(priority) - self.used_today)
+
+    def acquire(self, priority=USER):
+        """Block until a request may be sent; returns False once today's budget for the priority is spent."""
+        ticket = (priority, next(self._arrivals))
+        started = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self.used_today >= self.budget(priority):
+                        metrics.inc("quota_rejected_total", host=self.host, priority=priority)
+                        return False
+                    wait = None  # Not our turn: sleep until the caller ahead of us is done
+                    if self._waiters[0] == ticket:
+                        wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate if self.rate > 0 else 1.0)
+                        if wait <= 0:
+                            return self._count(priority)
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+                metrics.observe("quota_wait_seconds", time.monotonic() - started, host=self.host, priority=priority)
+
+    def reserve(self, priority=USER):
+        """Non-blocking acquire for asyncio callers: take a slot now and return the seconds to wait before
+        using it (the bucket goes into debt, pushing later callers back), or None once the budget is spent."""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            if self.used_today >= self.budget(priority):
+                metrics.inc("quota_rejected_total", host=self.host, priority=priority)
+                return None
+            if not self._count(priority):
+                return None
+            debt = -self.tokens / self.rate if self.tokens < 0 and self.rate > 0 else 0.0
+            return max(self.blocked_until - now, debt, 0.0)
+
+    def penalize(self, seconds):
+        """Hold every caller back after upstream throttled us."""
+        with self._cond:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self._cond.notify_all()
+
+
+_quotas = {}  # host -> HostQuota
+_pollers = {}  # name -> (host, calls per second at the requested interval, last planned time, last interval given)
+_lock = threading.Lock()
+
+
+def get_quota(host):
+    """Return the HostQuota of a host, or None for hosts without known limits."""
+    with _lock:
+        if host not in _quotas:
+            settings = dict(DEFAULT_QUOTAS.get(host, {}))
+            settings.update(config_loader.get("quotas", {}).get(host, {}))
+            _quotas[host] = HostQuota(host, **settings) if settings else None
+        return _quotas[host]
+
+
+def acquire(host, priority=None):
+    """Wait for a request slot on a host; False when the daily budget is spent. Hosts without limits pass."""
+    quota = get_quota(host)
+    return True if quota is None else quota.acquire(current_priority() if priority is None else priority)
+
+
+def reserve(host, priority=None):
+    """Reserve a request slot on a host without blocking; seconds to wait, or None when the budget is spent."""
+    quota = get_quota(host)
+    return 0.0 if quota is None else quota.reserve(current_priority() if priority is None else priority)
+
+
+def penalize(host, seconds):
+    """Back off every caller of a host for `seconds` (a 429 with Retry-After); False for hosts without limits."""
+    quota = get_quota(host)
+    if quota is None:
+        return False
+    quota.penalize(seconds)
+    return True
+
+
+def used_today(host=WEATHER_HOST):
+    """Requests every process has sent to a host today, as last read."""
+    quota = get_quota(host)
+    return 0 if quota is None else quota.used_today
+
+
+def sent_today(host=WEATHER_HOST):
+    """Requests this process has sent to a host today."""
+    quota = get_quota(host)
+    return 0 if quota is None else quota.sent_today
+
+
+def stretch_interval(name, interval, calls_per_cycle=1, host=WEATHER_HOST):
+    """Return the poll interval for a poller so that all active pollers fit the rest of today's budget.
+
+    Every poller states its wanted interval and how many requests a cycle costs; when their combined
+    rate would run out of background budget before the daily reset, every interval is stretched by the
+    same factor. Pollers that stop planning drop out after POLLER_TIMEOUT.
+    """
+    quota = get_quota(host)
+    if quota is None:
+        return interval
+    now = time.monotonic()
+    with _lock:
+        previous = _pollers.get(name)
+        _pollers[name] = (host, calls_per_cycle / interval, now, previous[3] if previous else interval)
+        for other, (_, _, planned, other_interval) in list(_pollers.items()):
+            if now - planned > other_interval + POLLER_TIMEOUT:
+                del _pollers[other]
+        demand = sum(rate for poller_host, rate, _, _ in _pollers.values() if poller_host == host)
+    left = seconds_until_reset()
+    remaining = quota.remaining(BACKGROUND)
+    if remaining <= 0:
+        stretched = max(interval, left)  # Nothing left today: wait for the reset
+    else:
+        stretched = interval * max(1.0, demand * left / remaining)
+    with _lock:
+        if name in _pollers:
+            _pollers[name] = _pollers[name][:3] + (stretched,)
+    metrics.set_gauge("poll_interval_seconds", stretched, poller=name)
+    return stretched
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit, parse_qsl, urlencode, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+import http_client
+
+FIXTURES_DIR = "fixtures"
+REDACTED_PARAMS = {"key"}  # API keys never reach the fixture files and don't affect matching
+RECORD_MAX_STATUS = 499  # 5xx are transient; recording them would replay an outage forever
+MODES = ("record", "replay")
+
+
+def canonical_url(url):
+    """Return the URL with API keys removed and query parameters sorted, used to match fixtures."""
+    parts = urlsplit(url)
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if name not in REDACTED_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def fixture_path(fixtures_dir, method, url):
+    """Return where the response to a request is stored: <dir>/<host>/<path>-<hash>.json."""
+    canonical = canonical_url(url)
+    parts = urlsplit(canonical)
+    stem = re.sub(r"[^A-Za-z0-9_.-]+", "_", parts.path.strip("/")) or "root"
+    digest = hashlib.sha1(f"{method} {canonical}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(fixtures_dir, parts.hostname or "unknown", f"{stem}-{digest}.json")
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Transport adapter that records real responses to disk or replays them, with injected latency and errors.
+
+    In "record" mode requests go to the network and every response below 500 is saved; in "replay"
+    mode nothing leaves the machine and unknown requests get a 404. `latency` (+ up to `jitter`)
+    seconds are added to each replayed response, and `error_rate` of them fail with `error_status`
+    (or a connection error when it is None), so the retry path gets exercised too.
+    """
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR, mode="replay", latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_status=503, seed=None, **kwargs):
+        if mode not in MODES:
+            raise ValueError(f"Unknown replay mode: {mode}")
+        super().__init__(**kwargs)
+        self.fixtures_dir = fixtures_dir
+        self.mode = mode
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)  # Seeded so a load test injects the same failures every run
+        self._random_lock = threading.Lock()
+        self.stats = {"recorded": 0, "replayed": 0, "missing": 0, "injected_errors": 0}
+
+    def send(self, request, **kwargs):
+        path = fixture_path(self.fixtures_dir, request.method, request.url)
+        if self.mode == "record":
+            response = super().send(request, **kwargs)
+            if response.status_code <= RECORD_MAX_STATUS:
+                self._save(path, request, response)
+            return response
+
+        with self._random_lock:
+            delay = self.latency + self._random.uniform(0, self.jitter) if self.jitter else self.latency
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            self._count("injected_errors")
+            if self.error_status is None:
+                raise requests.ConnectionError(f"Injected connection error for {canonical_url(request.url)}",
+                                               request=request)
+            return self._build(request, self.error_status, "Injected error", {}, b"")
+
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                fixture = json.load(file)
+        except FileNotFoundError:
+            self._count("missing")
+            print(f"No recorded response for {canonical_url(request.url)}")
+            return self._build(request, 404, "No recorded response", {}, b"")
+        self._count("replayed")
+        return self._build(request, fixture["status"], fixture.get("reason", ""), fixture.get("headers", {}),
+                           fixture["body"].encode("utf-8"))
+
+    def _save(self, path, request, response):
+        """Write one response as a small JSON document (atomically, so a concurrent replay never sees half a file)."""
+        fixture = {
+            "method": request.method,
+            "url": canonical_url(request.url),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {"Content-Type": response.headers.get("Content-Type", "application/json")},
+            "body": response.text,
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(fixture, file, ensure_ascii=False, indent=1)
+        os.replace(temp_path, path)
+        self._count("recorded")
+
+    def _count(self, name):
+        with self._random_lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def _build(request, status, reason, headers, body):
+        response = requests.Response()
+        response.status_code = status
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+
+def make_adapter(mode="replay", fixtures_dir=FIXTURES_DIR, **options):
+    """Build a ReplayAdapter sized like the shared session's own pool."""
+    return ReplayAdapter(fixtures_dir, mode, pool_connections=http_client.POOL_SIZE,
+                         pool_maxsize=http_client.POOL_SIZE, **options)
+
+
+def install(mode="replay", fixtures_dir=FIXTURES_DIR, **options):
+    """Route every request made through http_client via a ReplayAdapter; returns the adapter."""
+    adapter = make_adapter(mode, fixtures_dir, **options)
+    http_client.mount_transport(adapter)
+    return adapter
+
+
+def adapter_from_env(environ=os.environ):
+    """Build the adapter described by WEATHER_REPLAY_MODE / _DIR / _LATENCY / _ERROR_RATE, or None if no mode is set."""
+    mode = environ.get("WEATHER_REPLAY_MODE")
+    if not mode:
+        return None
+    return make_adapter(mode, environ.get("WEATHER_REPLAY_DIR", FIXTURES_DIR),
+                        latency=float(environ.get("WEATHER_REPLAY_LATENCY", 0)),
+                        error_rate=float(environ.get("WEATHER_REPLAY_ERROR_RATE", 0)))
@@ -0,0 +1,53 @@
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0  # Callers that joined instead of running func themselves
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one: the first caller runs, the rest wait for its result."""
+
+    def __init__(self):
+        self._calls = {}  # key -> _Call in progress
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args):
+        """Return (func(*args), shared); shared is True when the result came from another caller's call.
+
+        An exception raised by func is raised in every caller that waited on it.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]  # Later callers start a fresh call
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        """Number of keys with a call in progress."""
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,94 @@
+import math
+from collections import defaultdict
+
+EARTH_RADIUS_KM = 6371.0088  # Mean Earth radius
+# Haversine on the mean sphere is within ~0.56% of the WGS-84 geodesic, so anything further than this
+# fraction from a radius boundary is classified correctly without the (much slower) exact geodesic.
+HAVERSINE_TOLERANCE = 0.006
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km on the mean-radius sphere."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def geodesic_km(lat1, lon1, lat2, lon2):
+    """Exact WGS-84 geodesic distance in km (geopy is only imported when a boundary case needs it)."""
+    from geopy.distance import geodesic
+    return geodesic((lat1, lon1), (lat2, lon2)).kilometers
+
+
+class PointIndex:
+    """Lat/lng grid over points (alerts, storms) answering several radius queries in one pass."""
+
+    def __init__(self, points, cell_deg=5.0):
+        """Index (lat, lon, item) triples; cell_deg is the grid cell size in degrees."""
+        self.cell_deg = cell_deg
+        self._lon_cells = int(math.ceil(360 / cell_deg))
+        self._cells = defaultdict(list)
+        self._size = 0
+        for lat, lon, item in points:
+            self._cells[self._cell(lat, lon)].append((lat, lon, item))
+            self._size += 1
+
+    def __len__(self):
+        return self._size
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor((lon % 360) / self.cell_deg))
+
+    def _candidate_cells(self, lat, lon, radius_km):
+        """Return the grid cells that can hold points within radius_km of (lat, lon)."""
+        d_lat = radius_km / KM_PER_DEGREE_LAT
+        lat_lo, lat_hi = max(-90.0, lat - d_lat), min(90.0, lat + d_lat)
+        max_abs_lat = max(abs(lat_lo), abs(lat_hi))
+        if max_abs_lat >= 89.9:
+            lon_cells = range(self._lon_cells)  # Near a pole every longitude is close
+        else:
+            d_lon = d_lat / math.cos(math.radians(max_abs_lat))
+            if d_lon >= 180:
+                lon_cells = range(self._lon_cells)
+            else:
+                first = int(math.floor(((lon - d_lon) % 360) / self.cell_deg))
+                count = int(math.ceil(2 * d_lon / self.cell_deg)) + 1
+                lon_cells = {(first + i) % self._lon_cells for i in range(min(count, self._lon_cells))}
+        row_lo = int(math.floor(lat_lo / self.cell_deg))
+        row_hi = int(math.floor(lat_hi / self.cell_deg))
+        for row in range(row_lo, row_hi + 1):
+            for column in lon_cells:
+                yield row, column
+
+    def query(self, lat, lon, radii, boundaries=()):
+        """Return {radius: [(item, distance_km), ...]} sorted by distance, for every radius at once.
+
+        Distances come from a haversine prefilter; the exact geodesic is only computed for points
+        close enough to one of the radii (or to any extra `boundaries`) that the approximation could
+        put them on the wrong side.
+        """
+        radii = sorted(set(radii))
+        results = {radius: [] for radius in radii}
+        if not radii or not self._size:
+            return results
+        max_radius = radii[-1]
+        reach = max_radius * (1 + HAVERSINE_TOLERANCE)  # A point this far on the sphere can still be inside on WGS-84
+        edges = radii + sorted(set(boundaries))
+
+        for cell in self._candidate_cells(lat, lon, reach):
+            for point_lat, point_lon, item in self._cells.get(cell, ()):
+                distance = haversine_km(lat, lon, point_lat, point_lon)
+                if distance > reach:
+                    continue  # Clearly outside every radius
+                if any(abs(distance - edge) <= edge * HAVERSINE_TOLERANCE for edge in edges):
+                    distance = geodesic_km(lat, lon, point_lat, point_lon)  # Too close to call on the sphere
+                for radius in radii:
+                    if distance <= radius:
+                        results[radius].append((item, distance))
+
+        for matches in results.values():
+            matches.sort(key=lambda match: match[1])
+        return results
@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = ("main", "detect_typhoon", "headless")
+BUDGET_MS = {"main": 60, "detect_typhoon": 60}  # Import cost allowed before the first window can be drawn
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(module, python=sys.executable):
+    """Import a module in a fresh interpreter; returns {name: (self_us, cumulative_us, depth)} in import order."""
+    result = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    times = {}
+    for match in LINE.finditer(result.stderr):
+        self_us, cumulative_us, indent, name = match.groups()
+        times[name] = (int(self_us), int(cumulative_us), (len(indent) - 1) // 2)
+    return times
+
+
+def measure(module, runs=5, top=10):
+    """Return the median import cost of a module (excluding interpreter start-up) and its most expensive imports."""
+    baseline = set(import_times("sys"))  # Whatever site.py and .pth files load anyway
+    totals, last = [], {}
+    for _ in range(runs):
+        times = import_times(module)
+        last = {name: value for name, value in times.items() if name not in baseline}
+        totals.append(sum(cumulative for _, cumulative, depth in last.values() if depth == 0))
+    heaviest = sorted(((cumulative, self_us, name) for name, (self_us, cumulative, _) in last.items()), reverse=True)
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(totals) / 1000, 1),
+        "min_ms": round(min(totals) / 1000, 1),
+        "modules_imported": len(last),
+        "heaviest": [{"module": name, "cumulative_ms": round(cumulative / 1000, 1), "self_ms": round(self_us / 1000, 1)}
+                     for cumulative, self_us, name in heaviest[:top]],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report how long each entry point takes to import.")
+    parser.add_argument("modules", nargs="*", default=list(ENTRY_POINTS), help="Modules to measure")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module (default: 5)")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest imports to list (default: 10)")
+    parser.add_argument("--budget", type=float, help="Budget in ms for every module (default: per-module budgets)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    reports = [measure(module, args.runs, args.top) for module in args.modules]
+    over = []
+    for report in reports:
+        budget = args.budget if args.budget is not None else BUDGET_MS.get(report["module"])
+        report["budget_ms"] = budget
+        if budget is not None and report["median_ms"] > budget:
+            over.append(report["module"])
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            budget = f" (budget {report['budget_ms']} ms)" if report["budget_ms"] is not None else ""
+            print(f"{report['module']}: {report['median_ms']} ms median, {report['min_ms']} ms best, "
+                  f"{report['modules_imported']} modules{budget}")
+            for entry in report["heaviest"]:
+                print(f"    {entry['cumulative_ms']:8.1f} ms  {entry['module']} (self {entry['self_ms']} ms)")
+    if over:
+        print(f"Over budget: {', '.join(over)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# The modules live flat at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def quota_usage(tmp_path, monkeypatch):
+    """Count upstream requests in a throwaway database instead of the working copy's quota.db."""
+    import quota
+    monkeypatch.setattr(quota, "USAGE_DB", str(tmp_path / "quota.db"))
+    monkeypatch.setattr(quota, "_usage_db", None)
+    monkeypatch.setattr(quota, "_quotas", {})
@@ -0,0 +1,29 @@
+import sqlite3
+
+import pytest
+
+from address_book import AddressStore
+
+
+def test_legacy_log_is_imported_only_into_a_new_database(tmp_path):
+    log = tmp_path / "address.log"
+    log.write_text("B STREET\nA STREET\n", encoding="utf-8")
+    db = str(tmp_path / "addresses.db")
+
+    store = AddressStore(db, str(log))
+    assert store.addresses() == ["B STREET", "A STREET"]
+    for address in store.addresses():
+        store.remove(address)
+
+    assert AddressStore(db, str(log)).addresses() == []  # Deleting everything must not bring the log back
+
+
+def test_failed_batch_leaves_no_addresses_behind_in_memory(tmp_path):
+    db = str(tmp_path / "addresses.db")
+    store = AddressStore(db, None)
+    with pytest.raises(sqlite3.Error):
+        store.add_many([("A STREET", 1.0, 2.0), ("B STREET", [1.0], 2.0)])  # A list can't be bound: the INSERT fails
+
+    assert store.addresses() == []
+    assert store.add("A STREET", 1.0, 2.0)  # Not mistaken for a duplicate of the rolled-back row
+    assert AddressStore(db, None).addresses() == ["A STREET"]
@@ -0,0 +1,36 @@
+import asyncio
+import json
+
+from requests.adapters import HTTPAdapter
+
+import async_client
+import http_client
+import replay
+
+URL = "http://api.weatherapi.com/v1/current.json"
+PAYLOAD = {"location": {"name": "Balagtas"}, "current": {"temp_c": 31.2}}
+
+
+def test_async_requests_are_recorded_and_replayed(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_client, "_session", None)
+    monkeypatch.setattr(http_client, "_governed", True)
+    monkeypatch.setattr(http_client, "_transport", None)
+    upstream = []
+
+    def network(adapter, request, **kwargs):
+        upstream.append(request.url)
+        return replay.ReplayAdapter._build(request, 200, "OK", {"Content-Type": "application/json"},
+                                           json.dumps(PAYLOAD).encode("utf-8"))
+
+    monkeypatch.setattr(HTTPAdapter, "send", network)  # What record mode forwards to
+    params = {"key": "secret", "q": "14.8,120.9"}
+
+    recorder = replay.install("record", str(tmp_path))
+    assert asyncio.run(async_client.get_json(URL, params)) == PAYLOAD
+    assert recorder.stats["recorded"] == 1 and len(upstream) == 1
+
+    http_client.clear_recent()
+    player = replay.install("replay", str(tmp_path))
+    assert asyncio.run(async_client.get_json(URL, params)) == PAYLOAD
+    assert player.stats["replayed"] == 1 and len(upstream) == 1  # Served from the recording
+    http_client.clear_recent()
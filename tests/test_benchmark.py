@@ -0,0 +1,10 @@
+from benchmark import percentile
+
+
+def test_percentile_uses_the_nearest_rank():
+    assert percentile([1, 2, 3, 4, 5, 6], 0.5) == 3
+    assert percentile(list(range(1, 11)), 0.5) == 5
+    assert percentile(list(range(1, 101)), 0.99) == 99
+    assert percentile(list(range(1, 101)), 1.0) == 100
+    assert percentile([7], 0.5) == 7
+    assert percentile([], 0.5) is None
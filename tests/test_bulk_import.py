@@ -0,0 +1,38 @@
+import bulk_import
+from http_client import QuotaExceeded
+
+
+class FakeStore(set):
+    def add_many(self, entries):
+        self.update(address for address, _, _ in entries)
+
+
+class FakeCache:
+    def get(self, address):
+        return False, None
+
+    def save(self):
+        pass
+
+
+def test_addresses_past_the_daily_budget_are_deferred_not_failed(tmp_path, monkeypatch):
+    path = tmp_path / "sites.txt"
+    path.write_text("Manila\nNowhere\nCebu\nDavao\n", encoding="utf-8")
+    answers = {"MANILA": ("Manila, Philippines", 14.6, 121.0), "NOWHERE": (None, None, None)}
+
+    def lookup(address):
+        if address not in answers:
+            raise QuotaExceeded("Daily request budget for api.opencagedata.com is spent")
+        return answers[address]
+
+    store = FakeStore()
+    monkeypatch.setattr(bulk_import, "get_address_store", lambda: store)
+    monkeypatch.setattr(bulk_import, "geocode_cache", FakeCache())
+    monkeypatch.setattr(bulk_import, "lookup_coordinates", lookup)
+
+    imported, duplicates, failed, deferred = bulk_import.import_addresses(path, max_workers=1)
+
+    assert imported == ["MANILA, PHILIPPINES"]
+    assert failed == ["NOWHERE"]
+    assert deferred == ["CEBU", "DAVAO"]
+    assert store == {"MANILA, PHILIPPINES"}
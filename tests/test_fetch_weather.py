@@ -0,0 +1,17 @@
+import fetch_weather
+from observation_store import ObservationStore
+from test_observation_store import _observation
+
+
+def test_storage_failure_still_returns_the_report(tmp_path, monkeypatch):
+    store = ObservationStore(str(tmp_path))
+
+    def disk_full(observation):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(store, "append", disk_full)
+    monkeypatch.setattr(fetch_weather, "derive_weather", lambda *args: _observation(100, 31.0))
+    monkeypatch.setattr(fetch_weather, "format_weather", lambda observation: f"Temp: {observation.temp_c}")
+    monkeypatch.setattr(fetch_weather.forecast, "outlook", lambda lat, lng: None)
+
+    assert fetch_weather.weather_report({}, 14.6, 121.0, "Site", store) == "Temp: 31.0"
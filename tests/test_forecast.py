@@ -0,0 +1,52 @@
+import copy
+import time
+from collections import OrderedDict
+
+import forecast
+
+NOW = 1792291648  # 2026-10-18 02:47 UTC, 10:47 in Manila
+HOUR = 1792288800  # 02:00 UTC, the hour in progress
+
+
+def make_payload(updated=NOW - 60, precip=(0.0, 0.5, 12.0)):
+    hours = [{"time_epoch": HOUR + i * 3600, "precip_mm": p, "wind_kph": 10} for i, p in enumerate(precip)]
+    return {"location": {"lat": 14.8, "lon": 120.9, "tz_id": "Asia/Manila"},
+            "current": {"last_updated_epoch": updated},
+            "forecast": {"forecastday": [{"hour": hours}]}}
+
+
+def test_merge_detection_goes_by_content_not_object_id(monkeypatch):
+    monkeypatch.setattr(forecast, "_sites", OrderedDict())
+    payload = make_payload()
+    assert forecast.ingest(14.8, 120.9, payload, now=NOW) == 3
+    payload.update(make_payload(NOW, (0.0, 0.5, 20.0)))  # A newer forecast in the same object, as when an id is reused
+    assert forecast.ingest(14.8, 120.9, payload, now=NOW) == 1
+    assert forecast.get_site_forecast(14.8, 120.9).columns["precip_mm"][2] == 20.0
+    assert forecast.ingest(14.8, 120.9, copy.deepcopy(payload), now=NOW) == 0  # Same content, new object
+
+
+def test_outlook_time_is_on_the_site_clock(monkeypatch):
+    monkeypatch.setattr(forecast, "_sites", OrderedDict())
+    monkeypatch.setenv("TZ", "America/New_York")  # Server far from the site
+    time.tzset()
+    try:
+        forecast.ingest(14.8, 120.9, make_payload(), now=NOW)
+        result = forecast.outlook(14.8, 120.9, hours=6, now=NOW)
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
+    assert result["epoch"] == HOUR + 2 * 3600
+    assert result["time"] == "2026-10-18 12:00"
+
+
+def test_sites_are_kept_as_a_bounded_lru(monkeypatch):
+    monkeypatch.setattr(forecast, "_sites", OrderedDict())
+    monkeypatch.setattr(forecast.weather_cache, "MIN_ENTRIES", 2)
+    monkeypatch.setattr(forecast.weather_cache, "max_entries", lambda: 2)
+    forecast.ingest(1.0, 1.0, make_payload(), now=NOW)
+    forecast.ingest(2.0, 2.0, make_payload(), now=NOW)
+    assert forecast.get_site_forecast(1.0, 1.0) is not None  # Now the most recently used
+    forecast.ingest(3.0, 3.0, make_payload(), now=NOW)
+
+    assert forecast.get_site_forecast(2.0, 2.0) is None
+    assert forecast.get_site_forecast(1.0, 1.0) is not None and forecast.get_site_forecast(3.0, 3.0) is not None
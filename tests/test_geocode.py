@@ -0,0 +1,22 @@
+import pytest
+import requests
+
+import geocode
+from http_client import QuotaExceeded
+
+
+def test_spent_budget_is_raised_not_reported_as_unknown_address(monkeypatch):
+    def spent(address):
+        raise QuotaExceeded("Daily request budget for api.opencagedata.com is spent")
+
+    monkeypatch.setattr(geocode, "lookup_coordinates", spent)
+    with pytest.raises(QuotaExceeded):
+        geocode.get_coordinates("MANILA")
+
+
+def test_other_request_errors_still_read_as_not_found(monkeypatch):
+    def offline(address):
+        raise requests.ConnectionError("offline")
+
+    monkeypatch.setattr(geocode, "lookup_coordinates", offline)
+    assert geocode.get_coordinates("MANILA") == (None, None, None)
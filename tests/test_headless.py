@@ -0,0 +1,12 @@
+import headless
+from http_client import QuotaExceeded
+
+
+def test_spent_geocoding_budget_is_recorded_as_such(monkeypatch):
+    def spent(address):
+        raise QuotaExceeded("Daily request budget for api.opencagedata.com is spent")
+
+    monkeypatch.setattr(headless, "get_coordinates", spent)
+    record = headless.observe("MANILA")
+    assert record["quota_exceeded"] is True
+    assert record["error"] == "Daily request budget for api.opencagedata.com is spent"
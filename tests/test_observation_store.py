@@ -0,0 +1,38 @@
+import builtins
+
+import pytest
+
+from observation import WeatherObservation
+from observation_store import ObservationStore
+
+
+def _observation(epoch, temp_c):
+    return WeatherObservation(
+        location="Site", lat=14.6, lng=121.0, observed_epoch=epoch, temp_c=temp_c, feels_like_c=None,
+        humidity=70, wind_kph=10, wind_dir="N", wind_dir_degrees=0, wind_gust_kph=None, cloud_cover=None,
+        precip_mm=0, uv_index=None, visibility_km=None, pressure_mb=None, condition="Clear", sunrise=None,
+        sunset=None, moon_phase=None, solar_noon_minutes=720, wind_chill_c=None, hsi_c=None, hsi_category=0,
+    )
+
+
+def test_failed_append_does_not_shift_later_rows(tmp_path, monkeypatch):
+    store = ObservationStore(str(tmp_path))
+    assert store.append(_observation(100, 1.0))
+
+    real_open = builtins.open
+
+    def failing_open(path, mode="r", *args, **kwargs):
+        if str(path).endswith("wind_kph.bin") and "a" in mode:
+            raise OSError("No space left on device")
+        return real_open(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", failing_open)
+    with pytest.raises(OSError):
+        store.append(_observation(200, 2.0))
+    monkeypatch.setattr(builtins, "open", real_open)
+
+    assert store.append(_observation(300, 3.0))
+    rows = store.scan("Site", 0, 1000, ["temp_c", "wind_kph"])
+    assert rows["observed_epoch"].tolist() == [100, 300]
+    assert rows["temp_c"].tolist() == [1.0, 3.0]
+    assert rows["wind_kph"].tolist() == [10.0, 10.0]
@@ -0,0 +1,15 @@
+import quota
+
+
+def test_daily_budget_is_shared_between_processes_and_restarts():
+    gui = quota.HostQuota("api.example.com", per_second=1000, burst=1000, daily=3)
+    typhoon_window = quota.HostQuota("api.example.com", per_second=1000, burst=1000, daily=3)  # Another process
+
+    assert gui.acquire(quota.USER) and gui.acquire(quota.USER)
+    assert typhoon_window.acquire(quota.USER)
+    assert not gui.acquire(quota.USER)
+    assert typhoon_window.reserve(quota.USER) is None
+
+    restarted = quota.HostQuota("api.example.com", per_second=1000, burst=1000, daily=3)
+    assert restarted.remaining(quota.USER) == 0
+    assert (gui.sent_today, typhoon_window.sent_today) == (2, 1)
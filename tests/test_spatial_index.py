@@ -0,0 +1,46 @@
+import random
+
+from geopy.distance import geodesic
+
+from spatial_index import PointIndex, geodesic_km
+
+
+def _north_of(lat, lon, km):
+    point = geodesic(kilometers=km).destination((lat, lon), 0)
+    return point.latitude, point.longitude
+
+
+def _brute_force(points, lat, lon, radii):
+    results = {radius: [] for radius in radii}
+    for point_lat, point_lon, item in points:
+        distance = geodesic_km(lat, lon, point_lat, point_lon)
+        for radius in radii:
+            if distance <= radius:
+                results[radius].append(item)
+    return {radius: sorted(items) for radius, items in results.items()}
+
+
+def test_point_just_across_a_cell_boundary_is_found():
+    # 1995 km north of 1.97°N lands just above 20°N, one grid row beyond what the bare radius covers
+    alert_lat, alert_lon = _north_of(1.97, 120, 1995)
+    assert alert_lat > 20
+    index = PointIndex([(alert_lat, alert_lon, "alert")])
+    matches = index.query(1.97, 120, [2000])
+    assert [item for item, _ in matches[2000]] == ["alert"]
+
+
+def test_query_matches_geodesic_near_radius_edges():
+    rng = random.Random(7)
+    radii = [500, 1000, 1500, 2000]
+    points, centres = [], []
+    for i in range(40):
+        lat, lon = rng.uniform(-75, 75), rng.uniform(-180, 180)
+        centres.append((lat, lon))
+        for radius in radii:
+            km = radius * rng.uniform(0.99, 1.01)  # Straddle every radius
+            point = geodesic(kilometers=km).destination((lat, lon), rng.uniform(0, 360))
+            points.append((point.latitude, point.longitude, f"{i}-{radius}"))
+    index = PointIndex(points)
+    for lat, lon in centres[:10]:
+        found = {radius: sorted(item for item, _ in matches) for radius, matches in index.query(lat, lon, radii).items()}
+        assert found == _brute_force(points, lat, lon, radii)
@@ -0,0 +1,22 @@
+import typhoon_alerts
+
+
+def test_distant_sites_get_their_own_feed(monkeypatch):
+    fetched = []
+
+    def fake_alert_data(lat, lon):
+        fetched.append((lat, lon))
+        return {"alerts": {"alert": []}}
+
+    monkeypatch.setattr(typhoon_alerts, "get_alert_data", fake_alert_data)
+    sites = [("Manila", 14.6, 121.0), ("Quezon City", 14.68, 121.04), ("Tokyo", 35.68, 139.76),
+             ("Sydney", -33.87, 151.21)]
+    statuses = typhoon_alerts.monitor_sites(sites, radii=(500, 1000))
+
+    assert len(fetched) == 3  # Manila and Quezon City share a feed
+    feeds = {status.site: (status.feed_lat, status.feed_lon) for status in statuses}
+    assert feeds["Manila"] == feeds["Quezon City"]
+    assert len({feeds["Manila"], feeds["Tokyo"], feeds["Sydney"]}) == 3
+    for name, lat, lon in sites:  # Every site is checked against a feed fetched near it
+        feed_lat, feed_lon = feeds[name]
+        assert abs(feed_lat - lat) < 10 and abs(feed_lon - lon) < 10
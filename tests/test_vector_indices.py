@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import fetch_weather
+from vector_indices import (REGION_COOLING, equation_of_time_array, heat_index_array, solar_noon_array,
+                            wind_chill_array)
+
+SAMPLES = 5000
+
+
+@pytest.fixture(scope="module")
+def inputs():
+    rng = np.random.default_rng(0)
+    return {
+        "temp": rng.uniform(-40, 50, SAMPLES),
+        "humidity": rng.uniform(0, 100, SAMPLES),
+        "wind": rng.uniform(0, 150, SAMPLES),
+        "cloud": rng.uniform(0, 100, SAMPLES),
+        "altitude": rng.uniform(0, 9000, SAMPLES),
+        "night": rng.random(SAMPLES) < 0.5,
+        "longitude": rng.uniform(-180, 180, SAMPLES),
+    }
+
+
+def _value(x, like=0.0):
+    """Array element as the scalar code returns it: None for NaN, else the type of `like` (the scalar
+    wind chill is an int when the cooling effect is a whole number, which renders without a decimal)."""
+    return None if np.isnan(x) else type(like)(x)
+
+
+def test_heat_index_matches_calculate_hsi(inputs):
+    hi_c, category = heat_index_array(inputs["temp"], inputs["humidity"])
+    for i in range(SAMPLES):
+        temp, humidity = inputs["temp"][i], inputs["humidity"][i]
+        expected_c, expected_category = fetch_weather.heat_index(temp, humidity)
+        if expected_c is None:
+            assert np.isnan(hi_c[i]) and category[i] == -1
+        else:
+            assert hi_c[i] == pytest.approx(expected_c, rel=1e-12, abs=1e-9) and category[i] == expected_category
+        shown = fetch_weather.format_hsi(_value(hi_c[i]), None if category[i] < 0 else int(category[i]))
+        assert shown == fetch_weather.calculate_hsi(temp, humidity)
+
+
+@pytest.mark.parametrize("region", ["default"] + sorted(REGION_COOLING))
+@pytest.mark.parametrize("cloud_type", ["high", "mid", "low", None])
+def test_wind_chill_matches_calculate_wind_chill(inputs, region, cloud_type):
+    chill = wind_chill_array(inputs["temp"], inputs["wind"], inputs["humidity"], inputs["cloud"], cloud_type,
+                             inputs["altitude"], inputs["night"], region)
+    for i in range(SAMPLES):
+        args = (inputs["temp"][i], inputs["wind"][i], inputs["humidity"][i], inputs["cloud"][i], cloud_type,
+                inputs["altitude"][i], bool(inputs["night"][i]), region)
+        expected = fetch_weather.compute_wind_chill(*args)
+        if expected is None:
+            assert np.isnan(chill[i])
+        else:
+            assert chill[i] == pytest.approx(expected, rel=1e-12, abs=1e-9)
+        shown = fetch_weather.format_wind_chill(_value(chill[i], expected), inputs["temp"][i], inputs["wind"][i])
+        assert shown == fetch_weather.calculate_wind_chill(*args)
+
+
+def test_solar_noon_matches_calculate_solar_noon_on_every_day(inputs):
+    days = [date(2024, 1, 1) + timedelta(days=offset) for offset in range(366)]  # Leap year: includes day 366
+    assert days[-1].timetuple().tm_yday == 366
+    for i, day in enumerate(days):
+        day_of_year = day.timetuple().tm_yday
+        longitude = inputs["longitude"][i]
+        assert equation_of_time_array(day_of_year) == pytest.approx(fetch_weather.equation_of_time(day))
+        noon = solar_noon_array(longitude, day_of_year)
+        assert noon == pytest.approx(fetch_weather.solar_noon_minutes(longitude, day))
+        assert fetch_weather.format_solar_noon(float(noon)) == fetch_weather.calculate_solar_noon(longitude, day)
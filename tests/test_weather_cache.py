@@ -0,0 +1,61 @@
+import time
+
+import weather_cache
+
+URL = "http://api.weatherapi.com/v1/current.json"
+
+
+def payload(lat, lng):
+    return {"location": {"lat": lat + 0.05, "lon": lng + 0.05},  # weatherapi answers with its station's coordinates
+            "current": {"last_updated_epoch": int(time.time())}}
+
+
+def store(lat, lng):
+    return weather_cache._store(weather_cache.cache_key(URL, lat, lng), URL, None, payload(lat, lng))
+
+
+def test_station_aliases_do_not_count_against_the_cap(monkeypatch):
+    monkeypatch.setattr(weather_cache, "MIN_ENTRIES", 10)
+    monkeypatch.setattr(weather_cache, "max_entries", lambda: 10)
+    weather_cache.clear()
+    try:
+        for site in range(10):
+            store(site, 0.0)
+        assert len(weather_cache._entries) == 10
+        for site in range(10):
+            assert weather_cache._cached(weather_cache.cache_key(URL, site, 0.0), count=False)[0] is not None
+            station = weather_cache.cache_key(URL, site + 0.05, 0.05)
+            assert weather_cache._cached(station, count=False)[0] is not None
+
+        store(10, 0.0)  # Evicts site 0, and with it the station alias pointing at it
+        assert weather_cache._cached(weather_cache.cache_key(URL, 0.05, 0.05), count=False)[0] is None
+    finally:
+        weather_cache.clear()
+
+
+def test_cap_can_be_configured(monkeypatch):
+    monkeypatch.setattr(weather_cache.config_loader, "get",
+                        lambda key, default=None: 3 if key == "weather_cache_size" else default)
+    weather_cache.clear()
+    try:
+        for site in range(5):
+            store(site, 0.0)
+        assert len(weather_cache._entries) == 3
+    finally:
+        weather_cache.clear()
+
+
+def test_cap_is_worked_out_without_holding_the_lock(monkeypatch):
+    def sized_from_saved_sites():
+        assert not weather_cache._lock.locked()  # Opening the address store must not stall cache readers
+        return 2
+
+    monkeypatch.setattr(weather_cache, "MIN_ENTRIES", 1)
+    monkeypatch.setattr(weather_cache, "max_entries", sized_from_saved_sites)
+    weather_cache.clear()
+    try:
+        for site in range(4):
+            store(site, 0.0)
+        assert len(weather_cache._entries) == 2
+    finally:
+        weather_cache.clear()
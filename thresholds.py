@@ -0,0 +1,124 @@
+import json
+import os
+from bisect import bisect_left, bisect_right
+
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json")
+NO_RAIN_MESSAGE = "No significant rain detected."
+RAIN_CONDITION_DEFAULT = "Heavy rain detected. Conditions are dangerous!"
+RAIN_CONDITION_LIGHT = "Light rain detected. A light umbrella is recommended."
+
+
+class RainTable:
+    """Precipitation breakpoints (mm) and their messages; a reading gets the message of the highest breakpoint it reaches."""
+
+    def __init__(self, levels):
+        levels = sorted(levels, key=lambda level: level[0])
+        self.breakpoints = [mm for mm, _ in levels]  # Ascending, for bisect
+        self.messages = [message for _, message in levels]
+        self.exact = dict(levels)  # Only an exact breakpoint match counts when the condition says "rain"
+
+    def classify(self, precip_mm):
+        """Return the message for a positive reading (the caller handles zero and missing values)."""
+        return self.messages[bisect_right(self.breakpoints, precip_mm) - 1]
+
+    def indices(self, precip_mm):
+        """Vectorized classify: message index per reading, -1 where there is no positive precipitation."""
+        import numpy as np
+        precip_mm = np.asarray(precip_mm, dtype=float)
+        index = np.searchsorted(self.breakpoints, precip_mm, side="right") - 1
+        return np.where(precip_mm > 0, index, -1)  # NaN compares False, so missing readings count as no rain
+
+
+class TyphoonTable:
+    """Ordered (min precip mm, min wind kph, message) rules where the first rule met by both readings wins.
+
+    Both columns must be non-increasing down the table; the rules met by each reading then form a
+    suffix of the table, so the winning rule is the later of the two suffix starts, found with two
+    bisects instead of walking every rule.
+    """
+
+    def __init__(self, rules):
+        precip = [rule[0] for rule in rules]
+        wind = [rule[1] for rule in rules]
+        if any(a < b for a, b in zip(precip, precip[1:])) or any(a < b for a, b in zip(wind, wind[1:])):
+            raise ValueError("Typhoon thresholds must be ordered from most to least severe")
+        self._neg_precip = [-value for value in precip]  # Ascending, for bisect
+        self._neg_wind = [-value for value in wind]
+        self.messages = [rule[2] for rule in rules]
+        self._min_precip = precip[-1] if rules else float("inf")  # Below the mildest rule nothing can match
+        self._min_wind = wind[-1] if rules else float("inf")
+
+    def index(self, precip_mm, wind_kph):
+        """Return the index of the first rule met, or -1."""
+        if not (precip_mm >= self._min_precip and wind_kph >= self._min_wind):
+            return -1  # Common calm case; NaN also lands here since it never compares True
+        first = max(bisect_left(self._neg_precip, -precip_mm), bisect_left(self._neg_wind, -wind_kph))
+        return first if first < len(self.messages) else -1
+
+    def classify(self, precip_mm, wind_kph):
+        """Return the message of the first rule met, or None."""
+        index = self.index(precip_mm, wind_kph)
+        return self.messages[index] if index >= 0 else None
+
+    def indices(self, precip_mm, wind_kph):
+        """Vectorized index over arrays of readings."""
+        import numpy as np
+        precip_mm = np.asarray(precip_mm, dtype=float)
+        wind_kph = np.asarray(wind_kph, dtype=float)
+        first = np.maximum(np.searchsorted(self._neg_precip, -precip_mm, side="left"),
+                           np.searchsorted(self._neg_wind, -wind_kph, side="left"))
+        met = (first < len(self.messages)) & ~np.isnan(precip_mm) & ~np.isnan(wind_kph)
+        return np.where(met, first, -1)
+
+
+def load_tables(path=THRESHOLDS_FILE):
+    """Build the rain table and the per-region typhoon tables from the thresholds data file."""
+    with open(path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    rain_table = RainTable(data["rain_levels"])
+    typhoon_tables = {region: TyphoonTable(rules) for region, rules in data["typhoon_levels"].items()}
+    return rain_table, typhoon_tables
+
+
+RAIN_TABLE, TYPHOON_TABLES = load_tables()  # Built once; classification never allocates a table again
+
+
+def rain_message(precip_mm, weather_condition=None):
+    """Table-driven rain_stat.get_rain_message."""
+    if weather_condition and "rain" in weather_condition.lower():
+        if precip_mm > 0:
+            return RAIN_TABLE.exact.get(precip_mm, RAIN_CONDITION_DEFAULT)
+        return RAIN_CONDITION_LIGHT
+    if precip_mm > 0:
+        return RAIN_TABLE.classify(precip_mm)
+    return NO_RAIN_MESSAGE
+
+
+def typhoon_level(precip_mm, wind_kph, region="default"):
+    """Table-driven rain_stat.detect_typhoon_level: the region's own rules first, then the defaults."""
+    if region != "default" and region in TYPHOON_TABLES:
+        message = TYPHOON_TABLES[region].classify(precip_mm, wind_kph)
+        if message is not None:
+            return message
+    return TYPHOON_TABLES["default"].classify(precip_mm, wind_kph)
+
+
+def rain_messages(precip_mm):
+    """Classify an array of precipitation readings at once; returns an object array of messages."""
+    import numpy as np
+    messages = np.array(RAIN_TABLE.messages + [NO_RAIN_MESSAGE], dtype=object)
+    return messages[RAIN_TABLE.indices(precip_mm)]  # -1 picks the trailing "no rain" entry
+
+
+def typhoon_levels(precip_mm, wind_kph, region="default"):
+    """Classify arrays of (precip, wind) readings at once; returns an object array of messages or None."""
+    import numpy as np
+    default = TYPHOON_TABLES["default"]
+    messages = np.array(default.messages + [None], dtype=object)
+    result = messages[default.indices(precip_mm, wind_kph)]  # -1 picks the trailing None
+    if region != "default" and region in TYPHOON_TABLES:
+        table = TYPHOON_TABLES[region]
+        index = table.indices(precip_mm, wind_kph)
+        regional = np.array(table.messages + [None], dtype=object)[index]
+        result = np.where(index >= 0, regional, result)
+    return result
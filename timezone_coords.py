@@ -0,0 +1,122 @@
+import json
+import os
+import re
+import threading
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "timezone_coords.json")
+
+RULE_ZONES = {"EST5EDT": "America/New_York", "CST6CDT": "America/Chicago",
+              "MST7MDT": "America/Denver", "PST8PDT": "America/Los_Angeles"}
+# Renamed zones whose old name still means the same place. Other tzdata links point at whichever zone
+# now shares the clock rules, often another city or country (America/Coral_Harbour -> Panama), so
+# they are left out and looked up live instead.
+ALIASES = {
+    "Asia/Calcutta": "Asia/Kolkata", "Asia/Saigon": "Asia/Ho_Chi_Minh", "Asia/Katmandu": "Asia/Kathmandu",
+    "Asia/Rangoon": "Asia/Yangon", "Asia/Dacca": "Asia/Dhaka", "Asia/Thimbu": "Asia/Thimphu",
+    "Asia/Ulan_Bator": "Asia/Ulaanbaatar", "Asia/Macao": "Asia/Macau", "Asia/Ujung_Pandang": "Asia/Makassar",
+    "Asia/Ashkhabad": "Asia/Ashgabat", "Europe/Kiev": "Europe/Kyiv", "Europe/Uzhgorod": "Europe/Kyiv",
+    "America/Buenos_Aires": "America/Argentina/Buenos_Aires", "America/Catamarca": "America/Argentina/Catamarca",
+    "America/Cordoba": "America/Argentina/Cordoba", "America/Jujuy": "America/Argentina/Jujuy",
+    "America/Mendoza": "America/Argentina/Mendoza", "America/Indianapolis": "America/Indiana/Indianapolis",
+    "America/Louisville": "America/Kentucky/Louisville", "America/Godthab": "America/Nuuk",
+    "Atlantic/Faeroe": "Atlantic/Faroe", "Pacific/Truk": "Pacific/Chuuk", "Pacific/Ponape": "Pacific/Pohnpei",
+    "Pacific/Samoa": "Pacific/Pago_Pago", "Pacific/Enderbury": "Pacific/Kanton",
+    "US/Eastern": "America/New_York", "US/Central": "America/Chicago", "US/Mountain": "America/Denver",
+    "US/Pacific": "America/Los_Angeles", "US/Alaska": "America/Anchorage", "US/Hawaii": "Pacific/Honolulu",
+    "US/Arizona": "America/Phoenix", "US/Aleutian": "America/Adak", "US/Samoa": "Pacific/Pago_Pago",
+    "Canada/Eastern": "America/Toronto", "Canada/Central": "America/Winnipeg", "Canada/Mountain": "America/Edmonton",
+    "Canada/Pacific": "America/Vancouver", "Canada/Atlantic": "America/Halifax",
+    "Canada/Newfoundland": "America/St_Johns", "Mexico/General": "America/Mexico_City",
+    "Brazil/East": "America/Sao_Paulo", "Chile/Continental": "America/Santiago",
+    "Australia/NSW": "Australia/Sydney", "Australia/Victoria": "Australia/Melbourne",
+    "Australia/Queensland": "Australia/Brisbane", "Australia/West": "Australia/Perth",
+    "Australia/South": "Australia/Adelaide", "Australia/Tasmania": "Australia/Hobart",
+    "Australia/North": "Australia/Darwin",
+    "Japan": "Asia/Tokyo", "Singapore": "Asia/Singapore", "Hongkong": "Asia/Hong_Kong", "ROC": "Asia/Taipei",
+    "ROK": "Asia/Seoul", "NZ": "Pacific/Auckland", "Israel": "Asia/Jerusalem", "Iran": "Asia/Tehran",
+    "Egypt": "Africa/Cairo", "Turkey": "Europe/Istanbul", "Asia/Istanbul": "Europe/Istanbul",
+    "GB": "Europe/London", "Eire": "Europe/Dublin", "Poland": "Europe/Warsaw", "Portugal": "Europe/Lisbon",
+    "Iceland": "Atlantic/Reykjavik", "Cuba": "America/Havana", "Jamaica": "America/Jamaica",
+    "Libya": "Africa/Tripoli", "Kwajalein": "Pacific/Kwajalein", "W-SU": "Europe/Moscow",
+}
+UTC_NAMES = {"GMT", "GMT0", "GMT+0", "GMT-0", "Greenwich", "UCT", "UTC", "Universal", "Zulu"}
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def _load_table():
+    """Load the bundled zone -> [lat, lng] table on first use."""
+    global _table
+    with _table_lock:
+        if _table is None:
+            try:
+                with open(TABLE_PATH, "r", encoding="utf-8") as file:
+                    _table = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                _table = {}  # Every lookup falls back to live geocoding
+        return _table
+
+
+def lookup(timezone):
+    """Return the representative (lat, lng) of an IANA zone from the bundled table, or None if it isn't listed."""
+    coords = _load_table().get(timezone)
+    return tuple(coords) if coords else None
+
+
+def _parse_iso6709(value):
+    """Parse zone.tab coordinates such as +1435+12100 or -0501+11711245 into decimal degrees."""
+    lat_part, lng_part = re.match(r"([+-]\d+)([+-]\d+)$", value).groups()
+
+    def to_degrees(part, degree_digits):
+        sign = -1 if part[0] == "-" else 1
+        digits = part[1:]
+        degrees = int(digits[:degree_digits])
+        minutes = int(digits[degree_digits:degree_digits + 2])
+        seconds = int(digits[degree_digits + 2:] or 0)
+        return sign * (degrees + minutes / 60 + seconds / 3600)
+
+    return round(to_degrees(lat_part, 2), 4), round(to_degrees(lng_part, 3), 4)
+
+
+def build_table():
+    """Build the table from the tz database shipped with pytz (zone.tab coordinates plus curated aliases)."""
+    import pytz
+
+    zoneinfo = os.path.join(os.path.dirname(pytz.__file__), "zoneinfo")
+    table = {}
+    for name in ("zone.tab", "zone1970.tab"):
+        with open(os.path.join(zoneinfo, name), "r", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith("#") or not line.strip():
+                    continue
+                fields = line.rstrip("\n").split("\t")
+                table.setdefault(fields[2], list(_parse_iso6709(fields[1])))
+
+    # Only curated renames share their zone's coordinates; see ALIASES
+    for alias, zone in ALIASES.items():
+        if zone in table:
+            table.setdefault(alias, table[zone])
+
+    # POSIX-style US rule zones follow the city the tz database uses for the same rules
+    for zone, city in RULE_ZONES.items():
+        if city in table:
+            table.setdefault(zone, table[city])
+
+    # Fixed-offset zones have no location; use the equator at the offset's meridian
+    for zone in pytz.all_timezones:
+        match = re.match(r"(?:Etc/)?GMT([+-]\d+)$", zone)
+        if match:
+            meridian = (-int(match.group(1)) * 15.0 + 180) % 360 - 180  # Etc/GMT+5 is UTC-5, i.e. 75°W
+            table.setdefault(zone, [0.0, meridian])
+        elif zone.split("/")[-1] in UTC_NAMES:
+            table.setdefault(zone, [0.0, 0.0])
+
+    return {zone: table[zone] for zone in sorted(table) if zone in pytz.all_timezones_set}
+
+
+if __name__ == "__main__":
+    rebuilt = build_table()
+    with open(TABLE_PATH, "w", encoding="utf-8") as file:
+        json.dump(rebuilt, file, separators=(",", ":"), sort_keys=True)
+    print(f"Wrote {len(rebuilt)} zones to {TABLE_PATH}")
@@ -0,0 +1,174 @@
+import math
+
+import requests
+
+import weather_cache
+from observation import NearbyAlert, SiteAlertStatus
+from rain_stat import load_weather_config
+from spatial_index import KM_PER_DEGREE_LAT, PointIndex
+
+# Order of weatherapi alert severities, least to most severe
+SEVERITY_ORDER = ("Minor", "Moderate", "Severe", "Extreme")
+
+
+# Distances (km) at which an alert's typhoon level changes; classified exactly like the search radii
+LEVEL_BOUNDARIES = (100, 300)
+
+# Query params of the alert fetch; detect_typhoon asks for its station conditions with the same
+# params so both reads share one cached current.json payload
+ALERT_PARAMS = {"alerts": "yes"}
+
+# Spatial index over the last alert payload, reused while weather_cache keeps serving the same payload
+_alert_index = (None, None)
+
+
+# Function to classify typhoon level based on distance (simple categorization)
+def classify_typhoon_level(distance):
+    if distance < 100:
+        return 'Severe Typhoon (Very Close)'
+    elif distance < 300:
+        return 'Moderate Typhoon (Close)'
+    return 'Weak Typhoon (Far)'
+
+
+# Function to build (or reuse) the spatial index over the alerts in a payload
+def get_alert_index(data):
+    global _alert_index
+    payload, index = _alert_index
+    if payload is data:
+        return index
+
+    alerts = data.get('alerts', [])
+    if isinstance(alerts, dict):
+        alerts = alerts.get('alert', [])  # weatherapi nests the list as {"alert": [...]}
+    points = []
+    for alert in alerts:
+        typhoon_lat = alert.get('location', {}).get('lat', None)
+        typhoon_lon = alert.get('location', {}).get('lon', None)
+        if typhoon_lat and typhoon_lon:
+            points.append((typhoon_lat, typhoon_lon, alert))
+    index = PointIndex(points)
+    _alert_index = (data, index)
+    return index
+
+
+# Function to fetch the alert payload for a point
+def get_alert_data(lat, lon):
+    try:
+        api_key, weather_url = load_weather_config()
+        return weather_cache.get_json(weather_url, lat, lon, {"key": api_key, **ALERT_PARAMS})
+    except requests.HTTPError as e:
+        raise Exception(f"Error: Unable to fetch typhoon data (status code {e.response.status_code})")
+
+
+# Async get_alert_data
+async def get_alert_data_async(lat, lon):
+    try:
+        api_key, weather_url = load_weather_config()
+        return await weather_cache.get_json_async(weather_url, lat, lon, {"key": api_key, **ALERT_PARAMS})
+    except requests.HTTPError as e:
+        raise Exception(f"Error: Unable to fetch typhoon data (status code {e.response.status_code})")
+
+
+# Function to get typhoons within several radii at once, from a single alert fetch and index query
+def get_typhoons_within_radii(lat, lon, radii=(500, 1000, 1500, 2000)):
+    return nearby_alerts(get_alert_data(lat, lon), lat, lon, radii)
+
+
+# Async get_typhoons_within_radii
+async def get_typhoons_within_radii_async(lat, lon, radii=(500, 1000, 1500, 2000)):
+    return nearby_alerts(await get_alert_data_async(lat, lon), lat, lon, radii)
+
+
+# Function to list the alerts of a payload within each radius of a point
+def nearby_alerts(data, lat, lon, radii):
+    index = get_alert_index(data)
+    matches = index.query(lat, lon, radii, LEVEL_BOUNDARIES)
+    return {
+        radius: [NearbyAlert(
+            headline=alert.get('headline', 'No Headline'),
+            description=alert.get('description', 'No Description'),
+            distance=distance,
+            level=classify_typhoon_level(distance),
+        ) for alert, distance in found]
+        for radius, found in matches.items()
+    }
+
+
+# Function to get typhoons within a specified radius and classify Typhoon Level
+def get_typhoons_within_radius(lat, lon, radius_km=500):
+    return get_typhoons_within_radii(lat, lon, [radius_km])[radius_km]
+
+
+# Async get_typhoons_within_radius
+async def get_typhoons_within_radius_async(lat, lon, radius_km=500):
+    return (await get_typhoons_within_radii_async(lat, lon, [radius_km]))[radius_km]
+
+
+# Function to find the point whose alert feed covers a group of sites (their spherical centroid)
+def feed_point(sites):
+    x = y = z = 0.0
+    for _, lat, lon in sites:
+        phi, lam = math.radians(lat), math.radians(lon)
+        x += math.cos(phi) * math.cos(lam)
+        y += math.cos(phi) * math.sin(lam)
+        z += math.sin(phi)
+    return math.degrees(math.atan2(z, math.hypot(x, y))), math.degrees(math.atan2(y, x))
+
+
+# Function to group (name, lat, lon) sites into grid cells about `cell_km` wide, one alert feed per cell
+def cluster_sites(sites, cell_km):
+    cell_deg = min(180.0, cell_km / KM_PER_DEGREE_LAT)
+    clusters = {}
+    for site in sites:
+        _, lat, lon = site
+        row = math.floor(lat / cell_deg)
+        row_lat = min(89.0, abs((row + 0.5) * cell_deg))  # Cells widen in longitude towards the poles
+        lon_deg = min(360.0, cell_deg / math.cos(math.radians(row_lat)))
+        clusters.setdefault((row, math.floor((lon % 360) / lon_deg)), []).append(site)
+    return list(clusters.values())
+
+
+# Function to pick the most severe weatherapi severity among alerts
+def highest_severity(alerts):
+    ranked = [alert.get('severity') for alert in alerts if alert.get('severity') in SEVERITY_ORDER]
+    return max(ranked, key=SEVERITY_ORDER.index) if ranked else None
+
+
+# Function to evaluate many (name, lat, lon) sites against the alert feeds fetched once per cycle.
+# weatherapi only returns the alerts around the queried point, so sites are grouped into cells about
+# the largest radius wide and each cell's feed is fetched at its centroid; an explicit feed point
+# checks every site against that one feed instead.
+def monitor_sites(sites, radii=(500, 1000, 1500, 2000), feed_lat=None, feed_lon=None):
+    sites = list(sites)
+    if not sites:
+        return []
+    if feed_lat is not None and feed_lon is not None:
+        return check_sites(sites, radii, feed_lat, feed_lon)
+    statuses = []
+    for cluster in cluster_sites(sites, max(radii)):
+        statuses.extend(check_sites(cluster, radii, *feed_point(cluster)))  # One API call per cluster
+    return statuses
+
+
+# Function to check sites against the alert feed fetched at one point
+def check_sites(sites, radii, feed_lat, feed_lon):
+    index = get_alert_index(get_alert_data(feed_lat, feed_lon))
+    statuses = []
+    for name, lat, lon in sites:
+        matches = index.query(lat, lon, radii, LEVEL_BOUNDARIES)
+        inside = [radius for radius in sorted(matches) if matches[radius]]
+        nearest = matches[inside[-1]][0] if inside else None  # Largest radius holds every match, nearest first
+        statuses.append(SiteAlertStatus(
+            site=name,
+            lat=lat,
+            lon=lon,
+            alert_counts={radius: len(found) for radius, found in matches.items()},
+            nearest_radius=inside[0] if inside else None,
+            nearest_distance=nearest[1] if nearest else None,
+            level=classify_typhoon_level(nearest[1]) if nearest else None,
+            severity=highest_severity([alert for alert, _ in matches[inside[-1]]]) if inside else None,
+            feed_lat=feed_lat,
+            feed_lon=feed_lon,
+        ))
+    return statuses
@@ -0,0 +1,90 @@
+import numpy as np
+
+# Region-specific extra cooling used by compute_wind_chill above 10°C
+REGION_COOLING = {"tropical": 0.5, "arctic": 2.0, "desert": 0.2, "mountain": 1.0, "temperate": 0.5}
+CLOUD_TYPE_COOLING = {"high": 0.5, "mid": 1.0, "low": 1.5}
+
+
+def heat_index_array(temp_c, humidity):
+    """Vectorized fetch_weather.heat_index: returns (heat index °C, HSI category code) arrays."""
+    temp_c = np.asarray(temp_c, dtype=float)
+    humidity = np.asarray(humidity, dtype=float)
+
+    temp_f = (temp_c * 9 / 5) + 32
+    hi_f = (
+            -42.379 + 2.04901523 * temp_f + 10.14333127 * humidity - 0.22475541 * temp_f * humidity
+            - 6.83783 * 10 ** -3 * temp_f ** 2 - 5.481717 * 10 ** -2 * humidity ** 2
+            + 1.22874 * 10 ** -3 * temp_f ** 2 * humidity + 8.5282 * 10 ** -4 * temp_f * humidity ** 2
+            - 1.99 * 10 ** -6 * temp_f ** 2 * humidity ** 2
+    )
+    hi_c = (hi_f - 32) * 5 / 9
+
+    # Same breakpoints as heat_index: > 80, > 90, > 105, > 130 °F
+    category = (hi_f > 80).astype(np.int8) + (hi_f > 90) + (hi_f > 105) + (hi_f > 130)
+
+    not_applicable = (temp_c < 26.67) | (humidity < 40)  # Too cool or dry for heat stress
+    hi_c = np.where(not_applicable, np.nan, hi_c)
+    category = np.where(not_applicable, -1, category).astype(np.int8)
+    return hi_c, category
+
+
+def wind_chill_array(temp_c, wind_kph, humidity=None, cloud_cover=None, cloud_type=None, cloud_altitude=None,
+                     is_night=False, region="default"):
+    """Vectorized fetch_weather.compute_wind_chill; NaN where the wind is too light."""
+    temp_c = np.asarray(temp_c, dtype=float)
+    wind_kph = np.asarray(wind_kph, dtype=float)
+    is_night = np.asarray(is_night, dtype=bool)
+
+    # Cold branch: NWS wind chill formula in Fahrenheit
+    wind_mph = wind_kph * 0.621371
+    temp_f = (temp_c * 9 / 5) + 32
+    wind_factor = wind_mph ** 0.16
+    cold = ((35.74 + 0.6215 * temp_f - 35.75 * wind_factor + 0.4275 * temp_f * wind_factor) - 32) * 5 / 9
+
+    # Warm branch: linear cooling with regional, night, humidity and cloud adjustments
+    warm = temp_c - (0.3 * (wind_kph - 5))
+    warm = warm - np.where(wind_kph > 40, 2.0, 0.0)
+    region = np.asarray(region)
+    for name, cooling in REGION_COOLING.items():
+        warm = warm - np.where(region == name, cooling, 0.0)
+    warm = np.where(temp_c < -20, np.maximum(warm, -10), warm)
+    warm = np.where(temp_c > 40, np.minimum(warm, 40), warm)
+
+    night = is_night & (temp_c > 10)
+    night_cooling = np.minimum(2, 0.1 * temp_c)
+    if humidity is not None:
+        humidity = np.asarray(humidity, dtype=float)
+        night_cooling = night_cooling + np.where(np.isnan(humidity), 0.0, humidity / 100 * 1.5)
+    if cloud_cover is not None:
+        cloud_cover = np.asarray(cloud_cover, dtype=float)
+        has_cover = ~np.isnan(cloud_cover)
+        cloud_type = np.asarray(cloud_type)
+        for name, factor in CLOUD_TYPE_COOLING.items():
+            night_cooling = night_cooling + np.where(has_cover & (cloud_type == name), cloud_cover / 100 * factor, 0.0)
+        if cloud_altitude is not None:
+            cloud_altitude = np.asarray(cloud_altitude, dtype=float)
+            has_altitude = has_cover & ~np.isnan(cloud_altitude)
+            night_cooling = night_cooling + np.where(has_altitude & (cloud_altitude > 6000), 1.0, 0.0)
+            night_cooling = night_cooling + np.where(has_altitude & (cloud_altitude < 1000), 2.0, 0.0)
+            night_cooling = night_cooling + np.where(has_altitude & (cloud_cover > 70), 0.5, 0.0)
+    warm = warm - np.where(night, night_cooling, 0.0)
+
+    warm = np.maximum(warm, 5)
+    warm = warm - np.select([wind_kph > 30, wind_kph > 20, wind_kph > 10], [2.0, 1.0, 0.5], 0.0)
+
+    result = np.where(temp_c <= 10, cold, warm)
+    return np.where(wind_kph < 4.8, np.nan, result)
+
+
+def equation_of_time_array(day_of_year):
+    """Vectorized fetch_weather.equation_of_time (minutes) from day-of-year values."""
+    b = np.radians((360 / 365) * (np.asarray(day_of_year, dtype=float) - 81))
+    eot = 229.18 * (0.000075 + 0.001868 * np.cos(b) - 0.032077 * np.sin(b)
+                    - 0.014615 * np.cos(2 * b) - 0.040849 * np.sin(2 * b))
+    return np.round(eot, 2)
+
+
+def solar_noon_array(longitude, day_of_year):
+    """Vectorized fetch_weather.solar_noon_minutes: solar noon in minutes from midnight."""
+    time_offset = (np.asarray(longitude, dtype=float) - 15) * 4
+    return 12 * 60 - time_offset + equation_of_time_array(day_of_year)
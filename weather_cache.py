@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import OrderedDict
+
+import config_loader
+import http_client
+import metrics
+from singleflight import SingleFlight
+
+UPDATE_INTERVAL = 15 * 60  # weatherapi.com refreshes current conditions roughly every 15 minutes
+UPDATE_GRACE = 60  # Give upstream a minute to publish the new observation
+RETRY_INTERVAL = 60  # How soon to ask again when the expected update is late or the payload has no timestamp
+COORD_PRECISION = 2  # Decimal places kept in the cache key (~1 km)
+MIN_ENTRIES = 1000  # Payloads kept before the cache is sized from the saved-site count
+ENDPOINTS_PER_SITE = 2  # A refresh caches a site's current conditions and its forecast
+
+_entries = OrderedDict()  # cache key -> (payload, next_refresh_epoch)
+_aliases = OrderedDict()  # station cache key -> cache key of the entry holding its payload
+_lock = threading.Lock()
+_flights = SingleFlight()  # Concurrent misses for one key share a single upstream call
+_async_flights = {}  # (event loop, cache key) -> future of the call in progress
+
+
+def cache_key(url, lat, lng, params=None):
+    """Build the cache key from the endpoint, rounded coordinates and the non-secret query params."""
+    extra = tuple(sorted((k, str(v)) for k, v in (params or {}).items() if k not in ("key", "q")))
+    return url, round(float(lat), COORD_PRECISION), round(float(lng), COORD_PRECISION), extra
+
+
+def next_refresh_time(payload, now):
+    """Return the epoch at which fresh data can exist, based on current.last_updated_epoch."""
+    last_updated = payload.get("current", {}).get("last_updated_epoch")
+    if not last_updated:
+        return now + RETRY_INTERVAL
+    expected = last_updated + UPDATE_INTERVAL + UPDATE_GRACE
+    return expected if expected > now else now + RETRY_INTERVAL  # Upstream is late, poll again shortly
+
+
+def _cached(key, count=True):
+    """Return the fresh cached entry for a key (counting the hit), or (None, entry or None) when it must be fetched."""
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None and key in _aliases:
+            key = _aliases[key]
+            entry = _entries.get(key)  # Gone once the entry it points at is evicted
+        if entry is not None and time.time() < entry[1]:
+            _entries.move_to_end(key)
+            if count:
+                metrics.inc("cache_requests_total", cache="weather", result="hit")
+            return entry[0], entry  # Still the latest observation upstream has
+    return None, entry
+
+
+def _query(lat, lng, params):
+    query = dict(params or {})
+    query["q"] = f"{lat},{lng}"
+    return query
+
+
+def _store(key, url, params, payload):
+    """Cache a fetched payload until weatherapi can have a newer one."""
+    refresh = next_refresh_time(payload, time.time())
+    location = payload.get("location", {})
+    station = cache_key(url, location["lat"], location["lon"], params) if "lat" in location and "lon" in location else key
+    limit = entry_limit(len(_entries))  # May open the address store, so not while readers wait on the lock
+    with _lock:
+        _entries[key] = (payload, refresh)
+        _entries.move_to_end(key)
+        _aliases.pop(key, None)
+        if station != key:
+            # weatherapi snaps a query to its station; callers that go on to ask about the station's
+            # own coordinates (detect_typhoon's alert lookup) get this payload too, without a second entry
+            if station in _entries:
+                _entries[station] = (payload, refresh)
+            else:
+                _aliases[station] = key
+                _aliases.move_to_end(station)
+        while limit is not None and len(_entries) > limit:
+            _entries.popitem(last=False)
+        while limit is not None and len(_aliases) > limit:
+            _aliases.popitem(last=False)
+    return payload
+
+
+def entry_limit(count):
+    """max_entries() for a store about to grow past `count` entries, or None while no cap can be reached yet.
+
+    Call it before taking a lock: sizing from the saved sites opens the address store on first use.
+    """
+    if count < (config_loader.get("weather_cache_size") or MIN_ENTRIES):
+        return None
+    return max_entries()
+
+
+def max_entries():
+    """Payloads to keep: "weather_cache_size" in config.json, else room for every saved address (and as
+    many ad-hoc lookups) on each endpoint, at least MIN_ENTRIES."""
+    configured = config_loader.get("weather_cache_size")
+    if configured:
+        return int(configured)
+    from address_book import get_address_store
+    return max(MIN_ENTRIES, ENDPOINTS_PER_SITE * 2 * len(get_address_store()))
+
+
+def get_json(url, lat, lng, params=None):
+    """Return the weatherapi payload for a point, only hitting the API once newer data can exist.
+
+    Concurrent misses for the same key wait for the first one's call and get the same parsed payload.
+    """
+    key = cache_key(url, lat, lng, params)
+    payload, entry = _cached(key)
+    if payload is not None:
+        return payload
+
+    payload, shared = _flights.do(key, _fetch, key, url, lat, lng, params)
+    metrics.inc("cache_requests_total", cache="weather",
+                result="coalesced" if shared else "miss" if entry is None else "stale")
+    return payload
+
+
+def _fetch(key, url, lat, lng, params):
+    payload, _ = _cached(key, count=False)
+    if payload is not None:
+        return payload  # A call for this key finished between our cache check and joining the flight
+    response = http_client.get(url, params=_query(lat, lng, params))
+    response.raise_for_status()
+    return _store(key, url, params, response.json())
+
+
+async def get_json_async(url, lat, lng, params=None, priority=None):
+    """Async get_json over async_client, sharing this cache; concurrent misses in one event loop share a call."""
+    import asyncio
+    import async_client
+    key = cache_key(url, lat, lng, params)
+    payload, entry = _cached(key)
+    if payload is not None:
+        return payload
+
+    loop = asyncio.get_running_loop()
+    flight = _async_flights.get((loop, key))
+    if flight is not None:
+        metrics.inc("cache_requests_total", cache="weather", result="coalesced")
+        return await asyncio.shield(flight)  # One waiter being cancelled must not cancel the shared call
+    metrics.inc("cache_requests_total", cache="weather", result="miss" if entry is None else "stale")
+    flight = _async_flights[(loop, key)] = loop.create_future()
+    try:
+        payload = _store(key, url, params, await async_client.get_json(url, _query(lat, lng, params), priority))
+    except asyncio.CancelledError:
+        flight.cancel()
+        raise
+    except Exception as e:
+        flight.set_exception(e)
+        flight.exception()  # Marks it retrieved when nobody else was waiting
+        raise
+    else:
+        flight.set_result(payload)
+    finally:
+        del _async_flights[(loop, key)]
+    return payload
+
+
+def clear():
+    """Drop every cached payload."""
+    with _lock:
+        _entries.clear()
+        _aliases.clear()